@@ -0,0 +1,5 @@
+"""Performance benchmarks for hippy.
+
+Run everything with ``python -m benchmarks.run`` or a single comparison
+with ``python -m benchmarks.<name>``.
+"""
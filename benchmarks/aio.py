@@ -0,0 +1,71 @@
+"""Measure how long the event loop stalls while a large file is read."""
+import os
+import time
+import asyncio
+import tempfile
+import concurrent.futures
+
+import hippy
+from . import corpus
+
+
+async def ticker(stalls, interval=0.005):
+    """Record the longest time past interval between wake ups."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def stalled(read):
+    """Return the seconds taken by read and the loop's longest stall."""
+    stalls = [0]
+    tick = asyncio.ensure_future(ticker(stalls))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await read()
+    seconds = time.perf_counter() - start
+    # let the ticker record a stall which lasted until now
+    await asyncio.sleep(0.01)
+    tick.cancel()
+    return seconds, max(stalls)
+
+
+async def records(raw):
+    """Decode the bytes of a file through aiter_decode."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(raw)
+    reader.feed_eof()
+    return [record async for record in hippy.aiter_decode(reader)]
+
+
+def main():
+    """Compare blocking reads with aread and aiter_decode."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.hip')
+        with open(path, 'w') as f:
+            f.write(corpus.object_list(5000))
+        with open(path, 'rb') as f:
+            raw = f.read()
+
+        async def blocking():
+            return hippy.read(path)
+
+        processes = concurrent.futures.ProcessPoolExecutor(1)
+        readers = [
+            ('read', blocking),
+            ('aread thread', lambda: hippy.aread(path)),
+            ('aread process', lambda: hippy.aread(path, processes)),
+            ('aiter_decode', lambda: records(raw)),
+        ]
+        loop = asyncio.new_event_loop()
+        print('{:<14} {:>10} {:>12}'.format('reader', 'seconds', 'max stall'))
+        for (name, read) in readers:
+            (seconds, stall) = loop.run_until_complete(stalled(read))
+            print('{:<14} {:>10.3f} {:>12.4f}'.format(name, seconds, stall))
+        loop.close()
+        processes.shutdown()
+
+
+if __name__ == '__main__':
+    main()
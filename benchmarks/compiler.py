@@ -0,0 +1,66 @@
+"""Compare encoding to a string with dumping to a file object.
+
+Also dumps straight from a database cursor, which should take constant
+memory however many rows there are.
+"""
+import time
+import sqlite3
+import tracemalloc
+
+import hippy
+from . import corpus
+
+
+class Discard:
+
+    """A file object which throws away what is written to it."""
+
+    def write(self, text):
+        """Ignore text."""
+
+
+def measure(func):
+    """Return the time taken by func and the peak memory it allocated."""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start, peak
+
+
+def main():
+    """Time encode and dump on records built from a decoded object list."""
+    print('{:>10} {:>12} {:>10} {:>10} {:>10} {:>10}'.format(
+        'records', 'output MB', 'encode s', 'peak MB', 'dump s', 'peak MB'
+    ))
+    row = '{:>10} {:>12.2f} {:>10.3f} {:>10.2f} {:>10.3f} {:>10.2f}'
+    for records in (2000, 8000, 32000):
+        data = hippy.decode(corpus.object_list(records))
+        size = len(hippy.encode(data))
+        encode_time, encode_peak = measure(lambda: hippy.encode(data))
+        dump_time, dump_peak = measure(lambda: hippy.dump(data, Discard()))
+        print(row.format(
+            records, size / 1e6, encode_time, encode_peak / 1e6,
+            dump_time, dump_peak / 1e6,
+        ))
+
+    print()
+    print('{:>10} {:>10} {:>10}'.format('rows', 'dump s', 'peak MB'))
+    for rows in (10000, 40000, 160000):
+        db = sqlite3.connect(':memory:')
+        db.execute('create table t (id integer, name text, ratio real)')
+        db.executemany('insert into t values (?, ?, ?)', (
+            (i, 'row {}'.format(i), i / 7) for i in range(rows)
+        ))
+        dump_time, dump_peak = measure(
+            lambda: hippy.dump(db.execute('select * from t'), Discard())
+        )
+        print('{:>10} {:>10.3f} {:>10.2f}'.format(
+            rows, dump_time, dump_peak / 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
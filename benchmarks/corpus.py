@@ -0,0 +1,90 @@
+"""Generators for synthetic Hip documents used by the benchmarks."""
+import hippy
+
+
+def object_list(records):
+    """Return a top-level object list with the given number of records."""
+    return hippy.encode([
+        {
+            'id': i,
+            'name': 'record number {}'.format(i),
+            'ratio': i / 7,
+            'active': i % 2 == 0,
+            'parent': None,
+            'tags': ['alpha', 'beta', i],
+            'meta': {'created': 'yesterday', 'size': i * 3},
+        }
+        for i in range(records)
+    ])
+
+
+def comma_lists(rows, width):
+    """Return an object whose values are comma lists of width literals."""
+    return hippy.encode({
+        'row{}'.format(i): [j * 0.5 for j in range(width)]
+        for i in range(rows)
+    })
+
+
+def deep_object(depth):
+    """Return objects nested depth levels deep, a key at every level.
+
+    Written out directly since the compiler recurses once per level, with
+    a single space of indent per level to keep the size down.
+    """
+    lines = []
+    for i in range(depth):
+        indent = ' ' * i
+        lines.append('{}value{}: {}'.format(indent, i, i))
+        lines.append('{}child:'.format(indent))
+    lines.append('{}leaf: 1'.format(' ' * depth))
+    return '\n'.join(lines)
+
+
+def wide_object(keys):
+    """Return a single object with the given number of keys."""
+    return hippy.encode({
+        'key{}'.format(i): i if i % 3 else 'value {}'.format(i)
+        for i in range(keys)
+    })
+
+
+def newline_list(items):
+    """Return a newline list of literals and short comma lists."""
+    return hippy.encode({'values': [
+        [i, i + 1] if i % 5 == 1 else i * 1.5 for i in range(items)
+    ]})
+
+
+def strings(records):
+    """Return records holding long strings, some of them with escapes."""
+    return hippy.encode([
+        {
+            'plain': 'lorem ipsum dolor sit amet ' * 4,
+            'escaped': 'tab\there\nnewline "quoted" \'single\' \\ end',
+            'unicode': 'café ☃ naïve',
+        }
+        for _ in range(records)
+    ])
+
+
+def numbers(rows):
+    """Return an object of comma lists of ints, floats and exponents."""
+    return hippy.encode({
+        'row{}'.format(i): [
+            i, -i, i * 1.25, i * 1e-9, 12345678901234 + i, 0.1 + i,
+        ]
+        for i in range(rows)
+    })
+
+
+# the documents timed by benchmarks.run, built once they are needed
+documents = [
+    ('object_list', lambda: object_list(4000)),
+    ('wide_object', lambda: wide_object(20000)),
+    ('deep_object', lambda: deep_object(250)),
+    ('comma_lists', lambda: comma_lists(100, 200)),
+    ('newline_list', lambda: newline_list(20000)),
+    ('strings', lambda: strings(4000)),
+    ('numbers', lambda: numbers(5000)),
+]
@@ -0,0 +1,35 @@
+"""Compare the recursive and stack decode engines on deep and wide docs."""
+import hippy
+from . import corpus
+from .events import best_of
+
+
+def timing(doc, engine):
+    """Return the time to decode doc, or why it could not be decoded."""
+    try:
+        return '{:.3f}s'.format(
+            best_of(lambda: hippy.decode(doc, engine=engine))
+        )
+    except RuntimeError:
+        # RecursionError, which subclasses it, is new in Python 3.5
+        return 'recursion'
+
+
+def main():
+    """Time both engines on the same documents."""
+    docs = [
+        ('object list 4000', corpus.object_list(4000)),
+        ('comma lists 10x5000', corpus.comma_lists(10, 5000)),
+        ('deep object 100', corpus.deep_object(100)),
+        ('deep object 300', corpus.deep_object(300)),
+        ('deep object 1000', corpus.deep_object(1000)),
+    ]
+    print('{:<22} {:>10} {:>10}'.format('document', 'recursive', 'stack'))
+    for (name, doc) in docs:
+        print('{:<22} {:>10} {:>10}'.format(
+            name, timing(doc, 'recursive'), timing(doc, 'stack')
+        ))
+
+
+if __name__ == '__main__':
+    main()
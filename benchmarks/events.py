@@ -0,0 +1,29 @@
+"""Compare scanning a document with iterparse to a full decode."""
+import time
+
+import hippy
+from . import corpus
+
+
+def best_of(func, repeat=3):
+    """Return the fastest of a few runs of func."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    """Time decode against consuming every iterparse event."""
+    doc = corpus.object_list(8000)
+    print('decode    {:.3f}s'.format(best_of(lambda: hippy.decode(doc))))
+    print('iterparse {:.3f}s'.format(
+        best_of(lambda: sum(1 for _ in hippy.iterparse(doc)))
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Compare decoding a whole document with hippy.get for single values."""
+import time
+
+import hippy
+from . import corpus
+
+
+def best_of(func, repeat=3):
+    """Return the best time of func over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def main():
+    """Time getting a value near the start, the middle and the end."""
+    count = 5000
+    doc = corpus.object_list(count)
+    print('{:<24} {:>10}'.format('lookup', 'seconds'))
+    print('{:<24} {:>10.4f}'.format(
+        'decode', best_of(lambda: hippy.decode(doc)[count // 2]['name'])
+    ))
+    for index in (0, count // 2, count - 1):
+        path = '{}.name'.format(index)
+        print('{:<24} {:>10.4f}'.format(
+            'get ' + path, best_of(lambda: hippy.get(doc, path))
+        ))
+    paths = ['{}.name'.format(i) for i in range(0, count, 100)]
+    print('{:<24} {:>10.4f}'.format(
+        'get_many {} paths'.format(len(paths)),
+        best_of(lambda: hippy.get_many(doc, paths)),
+    ))
+
+
+if __name__ == '__main__':
+    main()
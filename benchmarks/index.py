@@ -0,0 +1,46 @@
+"""Compare reading a whole file with looking records up through an index."""
+import os
+import time
+import tempfile
+
+import hippy
+from . import corpus
+
+
+def timed(func):
+    """Return the time taken by func."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    """Time a full read, building the index and indexed lookups."""
+    count = 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.hip')
+        with open(path, 'w') as f:
+            f.write(corpus.object_list(count))
+
+        print('{:<24} {:>10}'.format('lookup', 'seconds'))
+        print('{:<24} {:>10.4f}'.format(
+            'read', timed(lambda: hippy.read(path)[count // 2])
+        ))
+        print('{:<24} {:>10.4f}'.format(
+            'build_index',
+            timed(lambda: hippy.build_index(path, ['id'])),
+        ))
+        with hippy.open_indexed(path) as f:
+            print('{:<24} {:>10.4f}'.format(
+                'open_indexed', timed(lambda: hippy.open_indexed(path).close())
+            ))
+            print('{:<24} {:>10.4f}'.format(
+                'record {}'.format(count // 2), timed(lambda: f[count // 2])
+            ))
+            print('{:<24} {:>10.4f}'.format(
+                'find id', timed(lambda: f.find('id', count - 1))
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Compare decoding a large config with lazily decoding one section."""
+import time
+
+import hippy
+from . import corpus
+
+
+def best_of(func, repeat=3):
+    """Return the best time of func over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def main():
+    """Time a full decode against a lazy decode reading a single section."""
+    records = hippy.decode(corpus.object_list(20))
+    doc = hippy.encode(
+        {'section{}'.format(i): records for i in range(200)}
+    )
+    print('{:,} characters'.format(len(doc)))
+    print('{:<20} {:>10}'.format('decoder', 'seconds'))
+    print('{:<20} {:>10.4f}'.format(
+        'decode', best_of(lambda: hippy.decode(doc)['section100'])
+    ))
+    print('{:<20} {:>10.4f}'.format(
+        'lazy, no access', best_of(lambda: hippy.decode(doc, lazy=True))
+    ))
+    print('{:<20} {:>10.4f}'.format(
+        'lazy, one section',
+        best_of(lambda: hippy.decode(doc, lazy=True)['section100']),
+    ))
+
+
+if __name__ == '__main__':
+    main()
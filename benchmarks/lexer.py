@@ -0,0 +1,25 @@
+"""Show that lexing time grows linearly with the size of the document."""
+import time
+
+from hippy.lexer import Lexer
+from . import corpus
+
+
+def main():
+    """Time the lexer on documents of doubling size."""
+    print('{:>10} {:>10} {:>10} {:>12}'.format(
+        'records', 'bytes', 'seconds', 'us/kB'
+    ))
+    for records in (1000, 2000, 4000, 8000, 16000):
+        doc = corpus.object_list(records)
+        start = time.perf_counter()
+        for _ in Lexer(doc):
+            pass
+        elapsed = time.perf_counter() - start
+        print('{:>10} {:>10} {:>10.3f} {:>12.1f}'.format(
+            records, len(doc), elapsed, elapsed * 1e6 / (len(doc) / 1024)
+        ))
+
+
+if __name__ == '__main__':
+    main()
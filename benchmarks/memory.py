@@ -0,0 +1,27 @@
+"""Measure the memory taken by the tokens of a parsed document."""
+import tracemalloc
+
+from hippy.lexer import Lexer
+from hippy.parser import Parser
+from . import corpus
+
+
+def main():
+    """Report the peak memory of tokenizing documents of doubling size."""
+    print('{:>10} {:>10} {:>10} {:>10} {:>12}'.format(
+        'records', 'bytes', 'tokens', 'peak MB', 'bytes/token'
+    ))
+    for records in (1000, 2000, 4000, 8000):
+        doc = corpus.object_list(records)
+        tracemalloc.start()
+        parser = Parser(Lexer(doc))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{:>10} {:>10} {:>10} {:>10.2f} {:>12.1f}'.format(
+            records, len(doc), parser.num_tokens, peak / 1e6,
+            peak / parser.num_tokens,
+        ))
+
+
+if __name__ == '__main__':
+    main()
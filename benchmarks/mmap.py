@@ -0,0 +1,44 @@
+"""Compare reading a file as text with lexing its memory mapped bytes."""
+import os
+import time
+import tempfile
+import tracemalloc
+
+import hippy
+from . import corpus
+
+
+def measure(func):
+    """Return the time taken by func and the peak memory it allocated."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """Time and trace both ways of reading files of growing size."""
+    print('{:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'records', 'file MB', 'text s', 'peak MB', 'mmap s', 'peak MB'
+    ))
+    row = '{:>10} {:>10.2f} {:>10.3f} {:>10.2f} {:>10.3f} {:>10.2f}'
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.hip')
+        for records in (1000, 4000, 16000):
+            with open(path, 'w') as f:
+                f.write(corpus.strings(records))
+            text_time, text_peak = measure(lambda: hippy.read(path))
+            mmap_time, mmap_peak = measure(
+                lambda: hippy.read(path, mmap=True)
+            )
+            print(row.format(
+                records, os.path.getsize(path) / 1e6, text_time,
+                text_peak / 1e6, mmap_time, mmap_peak / 1e6,
+            ))
+
+
+if __name__ == '__main__':
+    main()
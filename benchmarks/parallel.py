@@ -0,0 +1,39 @@
+"""Time decoding and encoding one large object list with more workers."""
+import os
+import time
+
+import hippy
+from . import corpus
+
+
+def timed(func):
+    """Return the time taken by func."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def scale(name, func):
+    """Print the time of func serially and with 2 to cpu_count workers."""
+    serial = timed(lambda: func(None))
+    print('{:<20} {:>10.3f} {:>10.2f}'.format(name, serial, 1))
+    cpus = os.cpu_count() or 1
+    for workers in sorted({2, 4, cpus} | set(range(2, cpus + 1, 2))):
+        seconds = timed(lambda: func(workers))
+        print('{:<20} {:>10.3f} {:>10.2f}'.format(
+            '{} workers={}'.format(name, workers), seconds, serial / seconds,
+        ))
+
+
+def main():
+    """Compare the serial and parallel decoder and compiler."""
+    doc = corpus.object_list(10000)
+    data = hippy.decode(doc)
+
+    print('{:<20} {:>10} {:>10}'.format('', 'seconds', 'speedup'))
+    scale('decode', lambda workers: hippy.decode(doc, workers=workers))
+    scale('encode', lambda workers: hippy.encode(data, workers=workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Compare the parser's precomputed lookahead to rescanning the tokens."""
+from hippy.lexer import Lexer
+from hippy.parser import Parser, StreamParser
+from . import corpus
+from .events import best_of
+
+
+class ScanningParser(Parser):
+
+    """Peeks ahead by walking the tokens, as the parser used to."""
+
+    _count_ws = StreamParser._count_ws
+    _skip_literals = StreamParser._skip_literals
+    _skip_blank = StreamParser._skip_blank
+    _next_indent = StreamParser._next_indent
+    _build_tables = StreamParser._build_tables
+
+
+def main():
+    """Time both parsers on the same token arrays."""
+    docs = [
+        ('comma lists 100x100', corpus.comma_lists(100, 100)),
+        ('comma lists 10x5000', corpus.comma_lists(10, 5000)),
+        ('object list 4000', corpus.object_list(4000)),
+        ('deep object 300', corpus.deep_object(300)),
+    ]
+    print('{:<22} {:>10} {:>10}'.format('document', 'scanning', 'lookahead'))
+    for (name, doc) in docs:
+        tokens = Lexer(doc).tokenize(comments=False)
+        print('{:<22} {:>9.3f}s {:>9.3f}s'.format(
+            name,
+            best_of(lambda: ScanningParser(tokens).data),
+            best_of(lambda: Parser(tokens).data),
+        ))
+
+
+if __name__ == '__main__':
+    main()
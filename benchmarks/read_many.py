@@ -0,0 +1,39 @@
+"""Compare reading many small files one by one with hippy.read_many."""
+import os
+import time
+import tempfile
+
+import hippy
+from . import corpus
+
+
+def timed(func):
+    """Return the time taken by func."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    """Time a plain loop and read_many with a growing number of workers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(2000):
+            path = os.path.join(tmp, 'tenant{}.hip'.format(i))
+            with open(path, 'w') as f:
+                f.write(corpus.object_list(10))
+            paths.append(path)
+
+        print('{:<14} {:>10}'.format('reader', 'seconds'))
+        print('{:<14} {:>10.3f}'.format(
+            'loop', timed(lambda: [hippy.read(path) for path in paths])
+        ))
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            print('{:<14} {:>10.3f}'.format(
+                'workers={}'.format(workers),
+                timed(lambda: list(hippy.read_many(paths, workers))),
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Time the lexer, parser and compiler on every corpus document.
+
+Run with ``python -m benchmarks.run``. Results can be saved as JSON with
+--output and checked against an earlier run with --compare, which exits
+with status 1 if any stage got slower by more than --threshold.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+from hippy.lexer import Lexer
+from hippy.parser import Parser
+from hippy.compiler import Compiler
+from . import corpus
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat runs of func."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def peak_memory(func):
+    """Return the peak memory in bytes allocated while running func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(doc, repeat):
+    """Return the results of each stage for a single document."""
+    tokens = Lexer(doc).tokenize(comments=False)
+    data = Parser(tokens).data
+    stages = [
+        ('lexer', lambda: Lexer(doc).tokenize(comments=False)),
+        ('parser', lambda: Parser(tokens).data),
+        ('compiler', lambda: Compiler(data).compile()),
+    ]
+
+    results = {}
+    megabytes = len(doc.encode('utf-8')) / 1e6
+    for (stage, func) in stages:
+        seconds = best_time(func, repeat)
+        results[stage] = {
+            'seconds': seconds,
+            'tokens_per_second': len(tokens) / seconds,
+            'mb_per_second': megabytes / seconds,
+            'peak_mb': peak_memory(func) / 1e6,
+        }
+
+    return results
+
+
+def run(names=None, repeat=3):
+    """Return the results for the named corpus documents, or all of them."""
+    results = {}
+    for (name, make) in corpus.documents:
+        if names and name not in names:
+            continue
+        results[name] = measure(make(), repeat)
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'results': results,
+    }
+
+
+def compare(base, new, threshold):
+    """Return the (document, stage, ratio) of stages which got slower.
+
+    ratio is the new time over the base time, only stages in both runs
+    with a ratio above 1 + threshold are returned.
+    """
+    regressions = []
+    for (name, stages) in sorted(new['results'].items()):
+        for (stage, result) in sorted(stages.items()):
+            try:
+                before = base['results'][name][stage]['seconds']
+            except KeyError:
+                continue
+            ratio = result['seconds'] / before
+            if ratio > 1 + threshold:
+                regressions.append((name, stage, ratio))
+
+    return regressions
+
+
+_row = '{:<14} {:<9} {:>9.4f} {:>12,.0f} {:>8.2f} {:>9.2f} {:>8}'
+
+
+def report(results, base=None):
+    """Print a table of results, with the change from base if given."""
+    print('{:<14} {:<9} {:>9} {:>12} {:>8} {:>9} {:>8}'.format(
+        'document', 'stage', 'seconds', 'tokens/s', 'MB/s', 'peak MB',
+        'change',
+    ))
+    for (name, stages) in sorted(results['results'].items()):
+        for (stage, result) in sorted(stages.items()):
+            change = ''
+            if base is not None:
+                try:
+                    before = base['results'][name][stage]['seconds']
+                    change = '{:+.0%}'.format(result['seconds'] / before - 1)
+                except KeyError:
+                    pass
+            print(_row.format(
+                name, stage, result['seconds'], result['tokens_per_second'],
+                result['mb_per_second'], result['peak_mb'], change,
+            ))
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line."""
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument('documents', nargs='*', help='corpus documents to run')
+    args.add_argument('--repeat', type=int, default=3)
+    args.add_argument('--output', help='save the results as JSON')
+    args.add_argument('--compare', help='JSON results to compare against')
+    args.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='allowed slowdown as a fraction, default 0.1',
+    )
+    args = args.parse_args(argv)
+
+    results = run(args.documents, args.repeat)
+    base = None
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+    report(results, base)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if base is not None:
+        regressions = compare(base, results, args.threshold)
+        for (name, stage, ratio) in regressions:
+            print('{} {} is {:.0%} slower'.format(name, stage, ratio - 1))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Compare loading a Hip file cold with loading it from its sidecar."""
+import os
+import time
+import tempfile
+
+import hippy
+from hippy.sidecar import sidecar_path
+from . import corpus
+
+
+def timed(func):
+    """Return the time taken by func."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    """Time plain reads, the read writing the sidecar and later reads."""
+    print('{:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'records', 'MB', 'parse s', 'first s', 'warm s'
+    ))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.hip')
+        for records in (1000, 4000, 16000):
+            with open(path, 'w') as f:
+                f.write(corpus.object_list(records))
+            if os.path.exists(sidecar_path(path)):
+                os.remove(sidecar_path(path))
+            cold = timed(lambda: hippy.read(path))
+            first = timed(lambda: hippy.read(path, sidecar=True))
+            warm = min(
+                timed(lambda: hippy.read(path, sidecar=True))
+                for _ in range(3)
+            )
+            print('{:>10} {:>10.2f} {:>10.3f} {:>10.3f} {:>10.4f}'.format(
+                records, os.path.getsize(path) / 1e6, cold, first, warm
+            ))
+
+
+if __name__ == '__main__':
+    main()
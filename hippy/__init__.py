@@ -1,24 +1,230 @@
 """Python parser for reading Hip data files."""
-from . import lexer, parser, compiler
+import os
+import mmap as _mmap
 
+from . import lexer, parser, compiler, events, pool, lazy as _lazy
+from . import sidecar as _sidecar
+from .stats import Stats
+from .index import build_index, open_indexed
+from .cache import HipCache, default_cache as _default_cache
 
-def encode(data):
-    """Encode data structure into a Hip serialized string."""
-    return compiler.Compiler(data).compile()
 
+def encode(data, default=None, stats=None, workers=None):
+    """Encode data structure into a Hip serialized string.
 
-def decode(string):
-    """Decode a Hip serialized string into a data structure."""
-    return parser.Parser(lexer.Lexer(string)).data
+    default is called with values which can't otherwise be encoded and
+    should return an encodable replacement, otherwise TypeError is raised.
+    If stats is a Stats object it records the time and nesting depth.
 
+    If workers is given a top-level list of dictionaries is compiled in
+    slices in that many worker processes, see hippy.pool.encode_pieces.
+    The result is the same as compiling it in this process.
+    """
+    if workers is not None:
+        if stats is not None:
+            raise ValueError('Stats are not recorded by workers')
+        return ''.join(pool.encode_pieces(data, workers, default))
+    elif stats is not None:
+        return stats.encode(data, default)
+    return compiler.Compiler(data, default=default).compile()
+
+
+def dump(data, fp, default=None, workers=None):
+    """Encode data structure and write it to a text file object.
+
+    The output is written in blocks while it is compiled rather than built
+    up as one string first. default and workers are used as in encode(),
+    with workers each slice is written once it and those before it are
+    compiled.
+    """
+    if workers is not None:
+        for piece in pool.encode_pieces(data, workers, default):
+            fp.write(piece)
+    else:
+        compiler.Compiler(data, default=default).dump(fp)
+
+
+def decode(
+    string, engine='recursive', stats=None, workers=None, lazy=False,
+):
+    """Decode a Hip serialized string into a data structure.
+
+    engine chooses the parser, 'recursive' for the recursive descent Parser
+    or 'stack' for the line based parser in hippy.events, which keeps an
+    explicit indentation stack and so handles any depth of nesting.
+
+    If stats is a Stats object it records timings and counts of the
+    decoding, only the recursive engine is instrumented.
+
+    If workers is given the records of a top-level object list are parsed
+    in that many worker processes, see hippy.pool.decode. The result is
+    the same as decoding it in this process.
+
+    If lazy is True a top-level object or object list is returned as a
+    hippy.lazy.LazyMapping or LazySequence, which only parses each value or
+    record the first time it is accessed.
+    """
+    if lazy:
+        if engine != 'recursive' or stats is not None or workers is not None:
+            raise ValueError('Lazy documents only use the recursive engine')
+        return _lazy.decode(string)
+    elif workers is not None:
+        if engine != 'recursive' or stats is not None:
+            raise ValueError('Workers only run the recursive engine')
+        return pool.decode(string, workers)
+    elif stats is not None:
+        if engine != 'recursive':
+            raise ValueError('Stats are only recorded by the recursive engine')
+        return stats.decode(string)
+    elif engine == 'recursive':
+        return parser.Parser(lexer.Lexer(string)).data
+    elif engine == 'stack':
+        return events.decode(string)
+    else:
+        raise ValueError('Unknown engine {}'.format(repr(engine)))
+
+
+def iterparse(source):
+    """Yield (event, value) pairs for a Hip string, file or chunk iterable.
+
+    See hippy.events.iterparse for the events produced.
+    """
+    return events.iterparse(source)
+
+
+def iter_decode(source):
+    """Yield the records of a top-level Hip object list one by one.
+
+    source is a string, text file object or iterable of chunks.
+    """
+    return events.iter_decode(source)
+
+
+def get(source, path, default=None):
+    """Return the value at path, such as 'bands.0.name', in a Hip document.
+
+    source is a string, text file object or iterable of chunks. Only the
+    containers along the path are decoded and reading stops once the value
+    is found, default is returned if it isn't there.
+    """
+    return events.get_many(source, [path], default)[path]
+
+
+def get_many(source, paths, default=None):
+    """Return a dict of the values at several paths of a Hip document.
+
+    The document is read once and only until the last value is found, see
+    hippy.events.get_many.
+    """
+    return events.get_many(source, paths, default)
+
+
+def read(
+    file_name, stream=False, cache=False, sidecar=False, mmap=False,
+    workers=None,
+):
+    """Read and decode a Hip file.
+
+    If stream is True the tokens are parsed as they are read, which is
+    slower but keeps memory use proportional to the decoded data rather
+    than the size of the file.
+
+    If cache is True the file is only decoded again once it has changed,
+    see HipCache, a HipCache can also be passed to use instead of the
+    shared one.
+
+    If sidecar is True the decoded data is also saved next to the file, in
+    the same path with a .hipc extension, and loaded from there while the
+    file is unchanged, see hippy.sidecar.
+
+    If mmap is True the file is memory mapped and its UTF-8 bytes lexed in
+    place, only the values in the file are decoded so the page cache holds
+    the only full copy of it.
+
+    If workers is given a file holding a top-level object list is parsed
+    in that many worker processes, as in decode().
+
+    These are different ways of reading the file, only one of them can be
+    used at a time.
+    """
+    chosen = [
+        name for (name, used) in (
+            ('stream', stream),
+            ('cache', cache is not False and cache is not None),
+            ('sidecar', sidecar),
+            ('mmap', mmap),
+            ('workers', workers is not None),
+        ) if used
+    ]
+    if len(chosen) > 1:
+        raise ValueError('{} can not be used together'.format(
+            ' and '.join(chosen)
+        ))
+
+    if sidecar:
+        return _sidecar.read(file_name)
+
+    if cache is True:
+        cache = _default_cache
+    if cache is not False and cache is not None:
+        return cache.read(file_name)
+
+    if workers is not None:
+        with open(file_name, 'r') as f:
+            return pool.decode(f.read(), workers)
+
+    if mmap:
+        with open(file_name, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # empty files can't be mapped
+                return parser.Parser(lexer.BytesLexer(b'')).data
+            with _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ) as m:
+                return parser.Parser(lexer.BytesLexer(m)).data
 
-def read(file_name):
-    """Read and decode a Hip file."""
     with open(file_name, 'r') as f:
-        return decode(f.read())
+        if stream:
+            return parser.StreamParser(lexer.StreamLexer(f)).data
+        else:
+            return parser.Parser(lexer.StreamLexer(f)).data
+
+
+def read_many(paths, workers=None, ordered=True):
+    """Read and decode many Hip files in a pool of worker processes.
+
+    Yields a hippy.pool.Result(path, data, error) for each path, in the
+    order of paths or as they are finished if ordered is False. Files which
+    can't be read have their exception as error, see hippy.pool.read_many.
+    """
+    return pool.read_many(paths, workers=workers, ordered=ordered)
 
 
 def write(file_name, data):
     """Encode and write a Hip file."""
     with open(file_name, 'w') as f:
-        f.write(encode(data))
+        dump(data, f)
+
+
+# asyncio is only imported once one of these is used, see hippy.aio
+
+def aread(file_name, executor=None, **kwargs):
+    """Read and decode a Hip file in an executor, returns an awaitable.
+
+    The keyword arguments are passed on to read(), see hippy.aio.aread.
+    """
+    from . import aio
+    return aio.aread(file_name, executor, **kwargs)
+
+
+def awrite(file_name, data, executor=None):
+    """Encode and write a Hip file in an executor, returns an awaitable."""
+    from . import aio
+    return aio.awrite(file_name, data, executor)
+
+
+def aiter_decode(reader, chunk_size=4096):
+    """Asynchronously iterate over the records read from a StreamReader.
+
+    See hippy.aio.aiter_decode.
+    """
+    from . import aio
+    return aio.aiter_decode(reader, chunk_size)
@@ -0,0 +1,107 @@
+"""Reads and writes Hip data without blocking an asyncio event loop."""
+import codecs
+import asyncio
+import functools
+
+from . import events
+from .lexer import Lexer
+from .parser import ParseError
+
+
+async def _run(executor, func, *args, **kwargs):
+    """Run func in executor, the loop's default one if it is None."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def aread(file_name, executor=None, **kwargs):
+    """Read and decode a Hip file in an executor.
+
+    The keyword arguments are passed on to hippy.read. The default executor
+    runs it in a thread, which only hands the event loop the GIL between
+    bytecodes while a large file parses; a ProcessPoolExecutor keeps the
+    parsing off the loop's process altogether.
+    """
+    # imported here so that the module can be imported by hippy itself
+    from . import read
+    return await _run(executor, read, file_name, **kwargs)
+
+
+async def awrite(file_name, data, executor=None):
+    """Encode and write a Hip file in an executor, see aread."""
+    from . import write
+    return await _run(executor, write, file_name, data)
+
+
+def _block_lines(block, line):
+    """Group the tokens of a block of whole lines into (indent, tokens).
+
+    The block is lexed after a comment line so that Lexer doesn't strip the
+    indentation of its first line, its tokens are numbered from line.
+    """
+    return events.lines(Lexer('#\n' + block, line - 1))
+
+
+async def aiter_decode(reader, chunk_size=4096):
+    """Yield the items of a top-level list read from an asyncio.StreamReader.
+
+    The UTF-8 input is read chunk_size bytes at a time and each run of
+    complete lines is parsed as it arrives, so every record is yielded as
+    soon as its last line has been read and the loop gets a turn between
+    chunks. The records are the same as hippy.iter_decode gives.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parser = events.EventParser()
+    started = False
+    line = 0
+    pending = ''
+    record = []
+    depth = -1
+
+    while True:
+        chunk = await reader.read(chunk_size)
+        eof = not chunk
+        pending += decoder.decode(chunk, final=eof)
+        if eof:
+            (block, pending) = (pending, '')
+        else:
+            end = pending.rfind('\n') + 1
+            (block, pending) = (pending[:end], pending[end:])
+
+        if not started:
+            # like Lexer, ignore whitespace at the start of the document
+            block = block.lstrip()
+            started = bool(block)
+        if block:
+            for (indent, tokens) in _block_lines(block, line):
+                parser.feed(indent, tokens)
+                if parser.done:
+                    break
+            line += block.count('\n')
+        if eof and not parser.done:
+            parser.close()
+
+        for (event, token) in parser.events:
+            if depth == -1:
+                if event != 'start_list':
+                    raise ParseError("'-'", token or events._end_token)
+                depth = 0
+                continue
+            elif depth == 0 and event == 'end_list':
+                return
+
+            record.append((event, token))
+            if event == 'start_object' or event == 'start_list':
+                depth += 1
+            elif event == 'end_object' or event == 'end_list':
+                depth -= 1
+            if depth == 0:
+                yield events.build(iter(record))
+                record = []
+        del parser.events[:]
+
+        if eof or parser.done:
+            return
+        await asyncio.sleep(0)
@@ -0,0 +1,89 @@
+"""Contains HipCache, which keeps decoded files around between reads."""
+import os
+import threading
+import collections
+
+from .lexer import StreamLexer
+from .parser import Parser
+
+
+def _copy(data):
+    """Copy the dictionaries and lists of decoded data."""
+    if type(data) is dict:
+        return {key: _copy(val) for (key, val) in data.items()}
+    elif type(data) is list:
+        return [_copy(val) for val in data]
+    else:
+        return data
+
+
+class HipCache:
+
+    """A thread-safe least recently used cache of decoded Hip files.
+
+    Entries are keyed on the absolute path and are only used while the
+    file's mtime, size and inode are unchanged. Once there are more than
+    max_entries files or their total size is over max_bytes the least
+    recently read are dropped. Every read returns a fresh copy of the data
+    so callers can't change what is cached.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        """Create an empty cache."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached files."""
+        return len(self._entries)
+
+    def read(self, file_name):
+        """Return the decoded contents of a file, reading it if needed."""
+        path = os.path.abspath(file_name)
+        info = os.stat(path)
+        key = (info.st_mtime_ns, info.st_size, info.st_ino)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return _copy(entry[1])
+            self.misses += 1
+
+        # parse outside of the lock so other files can still be read
+        with open(path, 'r') as f:
+            data = Parser(StreamLexer(f)).data
+
+        with self._lock:
+            self._discard(path)
+            self._entries[path] = (key, data)
+            self._bytes += info.st_size
+            while self._entries and (
+                len(self._entries) > self.max_entries or
+                self._bytes > self.max_bytes
+            ):
+                self._discard(next(iter(self._entries)))
+
+        return _copy(data)
+
+    def clear(self):
+        """Drop every cached file."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _discard(self, path):
+        """Drop the entry for path if there is one, the lock must be held."""
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[0][1]
+
+
+# used by hippy.read(file_name, cache=True)
+default_cache = HipCache()
@@ -1,103 +1,361 @@
 """Compiles data structure into a Hip serialized string."""
+import io
+import enum
+import itertools
+import collections.abc
+import decimal
+import datetime
+
+
+def _encode_bool(value):
+    """Return yes or no."""
+    return 'yes' if value else 'no'
+
+
+def _encode_null(value):
+    """Return nil."""
+    return 'nil'
+
+
+def _encode_decimal(value):
+    """Return a finite Decimal as written, Hip has no NaN or Infinity."""
+    if not value.is_finite():
+        raise ValueError(
+            'Decimal {} is not Hip serializable'.format(value)
+        )
+    return str(value)
+
+
+def _encode_isoformat(value):
+    """Return a date or time as an ISO 8601 string."""
+    return repr(value.isoformat())
+
+
+# maps a type to the function giving the Hip literal for its values,
+# subclasses use the encoder of their closest registered base class
+_encoders = {
+    str: str.__repr__,
+    int: int.__repr__,
+    float: float.__repr__,
+    bool: _encode_bool,
+    type(None): _encode_null,
+    decimal.Decimal: _encode_decimal,
+    datetime.datetime: _encode_isoformat,
+    datetime.date: _encode_isoformat,
+    datetime.time: _encode_isoformat,
+}
+
+
+def register_encoder(typ, encoder):
+    """Encode values of typ and its subclasses as encoder(value).
+
+    encoder must return the Hip literal for the value as a string.
+    """
+    _encoders[typ] = encoder
+
+
+class _Writer:
+
+    """Buffers compiled output and writes it out in blocks.
+
+    Whitespace at the start and end of the output is dropped, just like
+    strip() on the whole compiled string.
+    """
+
+    def __init__(self, write, buffer_size):
+        """Set the function blocks are written with and their size."""
+        self._out = write
+        self._buffer_size = buffer_size
+        self._buffer = io.StringIO()
+        self.write = self._buffer.write
+        self._started = False
+        # whitespace which is only written if more output follows
+        self._trailing = ''
+
+    def check(self):
+        """Flush the buffer once it is full."""
+        if self._buffer.tell() >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out the buffered output."""
+        block = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if not self._started:
+            block = block.lstrip()
+            self._started = bool(block)
+
+        body = block.rstrip()
+        if body:
+            self._out(self._trailing + body)
+            self._trailing = block[len(body):]
+        else:
+            self._trailing += block
+
+
+# how a value is laid out, worked out once per value by Compiler._classify()
+LITERAL = 'literal'
+OBJECT = 'object'
+EMPTY = 'empty'
+FLAT = 'flat'
+NESTED = 'nested'
 
 
-# TODO: use StringIO here
 class Compiler:
 
     """Compiles data structure into a Hip serialized string."""
 
-    def __init__(self, data, indent=4):
-        """Set the data structure."""
+    def __init__(self, data, indent=4, default=None, encoders=None):
+        """Set the data structure.
+
+        default is called with any value which can't otherwise be encoded
+        and should return something which can, encoders maps types to
+        encoders on top of those from register_encoder().
+        """
         self.data = data
         self.buffer = None
         self._indent = ' '*indent if indent > 0 else '\t'
+        self._default = default
+        # also caches the encoders found for subclasses
+        self._encoders = dict(_encoders)
+        if encoders is not None:
+            self._encoders.update(encoders)
+        self._write = None
+        self._check = self._no_check
 
     def compile(self):
         """Return Hip string if already compiled else compile it."""
         if self.buffer is None:
-            self.buffer = self._compile_value(self.data, 0)
+            buffer = io.StringIO()
+            self._write = buffer.write
+            self._check = self._no_check
+            self._compile()
+            self.buffer = buffer.getvalue()
 
         return self.buffer.strip()
 
-    def _compile_value(self, data, indent_level):
-        """Dispatch to correct compilation method."""
-        if isinstance(data, dict):
+    def dump(self, fp, buffer_size=65536):
+        """Write the Hip string to a text file object.
+
+        The output is written in blocks of roughly buffer_size characters
+        as it is compiled, so the whole string is never held in memory.
+        """
+        writer = _Writer(fp.write, buffer_size)
+        self._write = writer.write
+        self._check = writer.check
+        self._compile()
+        writer.flush()
+
+    def _no_check(self):
+        """Keep all of the output in memory."""
+
+    def _compile(self):
+        """Compile the data in a single pass.
+
+        Objects and nested lists are compiled by generators which yield
+        (value, layout, indent level) for each nested container they hit.
+        The generators are kept on an explicit stack, so the depth of the
+        data isn't limited by the recursion limit.
+        """
+        (data, layout) = self._classify(self.data)
+        if layout is OBJECT or layout is NESTED:
+            stack = [self._compile_container(data, layout, 0)]
+        else:
+            self._write(self._compile_flat(data, layout))
+            return
+
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+            else:
+                stack.append(self._compile_container(*child))
+
+    def _encoder(self, typ):
+        """Return the encoder for a literal type or None if there isn't one.
+
+        The encoder of the closest registered base class is cached for
+        subclasses.
+        """
+        encoder = self._encoders.get(typ)
+        if encoder is None:
+            for base in typ.__mro__[1:]:
+                if base in self._encoders:
+                    encoder = self._encoders[typ] = self._encoders[base]
+                    break
+            else:
+                if issubclass(typ, enum.Enum):
+                    encoder = self._encoders[typ] = self._encode_enum
+
+        return encoder
+
+    def _classify(self, value):
+        """Return the value to compile and its layout.
+
+        Only the direct items of lists are looked at. Mappings are compiled
+        as objects and other iterables as lists, values which can't be
+        encoded are replaced by the result of the default hook.
+        """
+        encoders = self._encoders
+        # the types default was called for
+        defaulted = None
+        while True:
+            typ = type(value)
+            if typ in encoders:
+                return value, LITERAL
+            elif isinstance(value, dict):
+                return value, OBJECT
+            elif isinstance(value, list):
+                if not value:
+                    return value, EMPTY
+                for item in value:
+                    if type(item) not in encoders and (
+                        isinstance(item, (dict, list)) or
+                        self._encoder(type(item)) is None
+                    ):
+                        return value, NESTED
+                return value, FLAT
+            elif self._encoder(typ) is not None:
+                return value, LITERAL
+            elif isinstance(value, collections.abc.Mapping):
+                return value, OBJECT
+            elif (
+                isinstance(value, collections.abc.Iterable) and
+                not isinstance(value, (bytes, bytearray))
+            ):
+                return self._classify_iterable(value)
+            elif self._default is None:
+                raise TypeError(
+                    'Object of type {} is not Hip serializable'.format(
+                        typ.__name__
+                    )
+                )
+            elif defaulted is not None and typ in defaulted:
+                raise ValueError(
+                    'Circular reference detected, default returned a value '
+                    'of type {} again'.format(typ.__name__)
+                )
+            else:
+                if defaulted is None:
+                    defaulted = set()
+                defaulted.add(typ)
+                value = self._default(value)
+
+    def _classify_iterable(self, iterable):
+        """Return the items of any other iterable and their layout.
+
+        Items are only read up to the first one which isn't a literal, so
+        that generators are still consumed lazily when the list is nested.
+        """
+        encoders = self._encoders
+        iterator = iter(iterable)
+        literals = []
+        for item in iterator:
+            if type(item) not in encoders and (
+                isinstance(item, (dict, list)) or
+                self._encoder(type(item)) is None
+            ):
+                return itertools.chain(literals, [item], iterator), NESTED
+            literals.append(item)
+
+        return literals, FLAT if literals else EMPTY
+
+    def _compile_container(self, data, layout, indent_level):
+        """Return the generator compiling an object or nested list."""
+        if layout is OBJECT:
             return self._compile_key_val(data, indent_level)
-        elif isinstance(data, list):
-            return self._compile_list(data, indent_level)
         else:
+            return self._compile_list(data, indent_level)
+
+    def _compile_flat(self, data, layout):
+        """Return the representation of a literal or list of literals."""
+        if layout is LITERAL:
             return self._compile_literal(data)
+        elif layout is EMPTY:
+            return '--'
+        else:
+            encoders = self._encoders
+            return ', '.join([encoders[type(value)](value) for value in data])
 
     def _compile_literal(self, data):
         """Write correct representation of literal."""
-        if data is None:
-            return 'nil'
-        elif data is True:
-            return 'yes'
-        elif data is False:
-            return 'no'
-        else:
-            return repr(data)
+        return self._encoders[type(data)](data)
+
+    def _encode_enum(self, value):
+        """Encode an enum member as its value."""
+        (value, layout) = self._classify(value.value)
+        if layout is not LITERAL:
+            raise TypeError('Enum values must be literals')
+        return self._compile_literal(value)
 
     def _compile_list(self, data, indent_level):
-        """Correctly write possibly nested list."""
-        if len(data) == 0:
-            return '--'
-        elif not any(isinstance(i, (dict, list)) for i in data):
-            return ', '.join(self._compile_literal(value) for value in data)
-        else:
-            # 'ere be dragons,
-            # granted there are fewer dragons than the parser,
-            # but dragons nonetheless
-            buffer = ''
-            i = 0
-            while i < len(data):
-                if isinstance(data[i], dict):
-                    buffer += '\n'
-                    buffer += self._indent * indent_level
-                    while i < len(data) and isinstance(data[i], dict):
-                        buffer += '-\n'
-                        buffer += self._compile_key_val(data[i], indent_level)
-                        buffer += self._indent * indent_level + '-'
-                        i += 1
-                    buffer += '\n'
-                elif (
-                    isinstance(data[i], list) and
-                    any(isinstance(item, (dict, list)) for item in data[i])
-                ):
-                    buffer += self._compile_list(data[i], indent_level+1)
-                elif isinstance(data[i], list):
-                    buffer += '\n'
-                    buffer += self._indent * indent_level
-                    buffer += self._compile_list(data[i], indent_level+1)
-                else:
-                    buffer += '\n'
-                    buffer += self._indent * indent_level
-                    buffer += self._compile_literal(data[i])
-
-                i += 1
-
-            return buffer
+        """Correctly write a list holding objects or lists."""
+        # 'ere be dragons,
+        # granted there are fewer dragons than the parser,
+        # but dragons nonetheless
+        write = self._write
+        encoders = self._encoders
+        indent = self._indent * indent_level
+        in_objects = False
+        for item in data:
+            encoder = encoders.get(type(item))
+            if encoder is not None:
+                layout = LITERAL
+            else:
+                (item, layout) = self._classify(item)
+            if layout is OBJECT:
+                # a run of objects makes up an object list
+                if not in_objects:
+                    write('\n')
+                    write(indent)
+                    in_objects = True
+                write('-\n')
+                yield item, OBJECT, indent_level
+                write(indent + '-')
+                self._check()
+                continue
+            elif in_objects:
+                write('\n')
+                in_objects = False
+
+            if layout is NESTED:
+                yield item, NESTED, indent_level+1
+            elif layout is LITERAL:
+                write('\n' + indent + self._compile_literal(item))
+            else:
+                write('\n')
+                write(indent)
+                write(self._compile_flat(item, layout))
+            self._check()
+
+        if in_objects:
+            write('\n')
 
     def _compile_key_val(self, data, indent_level):
         """Compile a dictionary."""
-        buffer = ''
-        for (key, val) in list(data.items()):
-            buffer += self._indent * indent_level
+        write = self._write
+        encoders = self._encoders
+        indent = self._indent * indent_level
+        for (key, val) in data.items():
             # TODO: assumes key is a string
-            buffer += key + ':'
+            encoder = encoders.get(type(val))
+            if encoder is not None:
+                # the common case of a literal of a known type
+                write(indent + key + ': ' + encoder(val) + '\n')
+                self._check()
+                continue
 
-            if isinstance(val, dict):
-                buffer += '\n'
-                buffer += self._compile_key_val(val, indent_level+1)
-            elif (
-                isinstance(val, list) and
-                any(isinstance(i, (dict, list)) for i in val)
-            ):
-                buffer += self._compile_list(val, indent_level+1)
+            write(indent)
+            write(key + ':')
+            (val, layout) = self._classify(val)
+            if layout is OBJECT:
+                write('\n')
+                yield val, OBJECT, indent_level+1
+            elif layout is NESTED:
+                yield val, NESTED, indent_level+1
             else:
-                buffer += ' '
-                buffer += self._compile_value(val, indent_level)
-                buffer += '\n'
-
-        return buffer
+                write(' ')
+                write(self._compile_flat(val, layout))
+                write('\n')
+            self._check()
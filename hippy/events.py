@@ -0,0 +1,455 @@
+"""Contains the event based parser behind hippy.iterparse."""
+import itertools
+
+from .lexer import Lexer, StreamLexer, Token, TokenType as TT
+from .parser import ParseError
+
+
+_literals = (TT.str, TT.int, TT.float, TT.bool, TT.null)
+
+_end_token = Token(None, None, -1)
+
+# kinds of open container
+OBJECT = 'object'
+LIST = 'list'
+OBJECT_LIST = 'object_list'
+
+
+def lex(source):
+    """Return a lexer for a string, text file object or iterable of chunks."""
+    if isinstance(source, str):
+        return Lexer(source)
+    else:
+        return StreamLexer(source)
+
+
+def lines(tokens):
+    """Group tokens into (indent, tokens) lines.
+
+    The indent is the number of whitespace tokens at the start of the line,
+    whitespace inside the line, comments and blank lines are dropped.
+    """
+    indent = 0
+    content = []
+    for token in tokens:
+        typ = token.type
+        if typ is TT.lbreak:
+            if content:
+                yield indent, content
+                content = []
+            indent = 0
+        elif typ is TT.ws:
+            if not content:
+                indent += 1
+        elif typ is TT.hyphen and (
+            content and content[-1].type in _literals or
+            len(content) == 2 and content[0].type is content[1].type is typ
+        ):
+            # like Parser, a hyphen straight after a literal or after the
+            # '--' of an empty list item starts a new unindented line, the
+            # compiler closes nested lists this way
+            yield indent, content
+            content = [token]
+            indent = 0
+        elif typ is not TT.comment:
+            content.append(token)
+
+    if content:
+        yield indent, content
+
+
+class EventParser:
+
+    """Turns lines of tokens into a flat stream of events.
+
+    Lines are pushed in with feed() and the resulting (event, token) pairs
+    collect in events, where token is the Token of a key or value, the first
+    token of a started object or list and None for the end of one. Open
+    containers are kept on an explicit stack of (kind, indent) pairs so
+    nesting costs no recursion, and at most one line is held back to decide
+    whether a literal starts a newline list.
+    """
+
+    def __init__(self):
+        """Expect the top-level value."""
+        self.events = []
+        self.done = False
+        self._stack = []
+        self._expect_value = True
+        self._pending = None
+
+    def feed(self, indent, tokens):
+        """Parse a single non-blank line."""
+        if self.done:
+            return
+
+        if self._pending is not None:
+            pending_indent, pending = self._pending
+            self._pending = None
+            if tokens[0].type in _literals:
+                self.events.append(('start_list', pending))
+                self.events.append(('value', pending))
+                self._stack.append((LIST, pending_indent))
+            else:
+                self.events.append(('value', pending))
+                self._value_done()
+                if self.done:
+                    return
+
+        if self._expect_value:
+            self._expect_value = False
+            self._open_value(indent, tokens)
+        else:
+            self._continue(indent, tokens)
+
+    def close(self):
+        """Finish the document, closing any open containers."""
+        if self._pending is not None:
+            self.events.append(('value', self._pending[1]))
+            self._pending = None
+        elif self._expect_value and not self.done:
+            raise ParseError('value', _end_token)
+
+        while self._stack:
+            self._pop()
+        self.done = True
+
+    def _value_done(self):
+        """Finish the document once the top-level value is complete."""
+        if not self._stack:
+            self.done = True
+
+    def _pop(self):
+        """Close the innermost container."""
+        kind, _ = self._stack.pop()
+        if kind is OBJECT:
+            self.events.append(('end_object', None))
+        else:
+            self.events.append(('end_list', None))
+
+    def _open_value(self, indent, tokens):
+        """Start the value on the line after a key or at the start."""
+        typ = tokens[0].type
+        if typ is TT.id:
+            self.events.append(('start_object', tokens[0]))
+            self._stack.append((OBJECT, indent))
+            self._key(indent, tokens)
+        elif typ is TT.hyphen:
+            self._hyphens(indent, tokens)
+        elif typ in _literals:
+            if len(tokens) == 1:
+                # a newline list if the next line starts with a literal
+                self._pending = (indent, tokens[0])
+            else:
+                self._comma_list(tokens)
+                self._value_done()
+        else:
+            raise ParseError('value', tokens[0])
+
+    def _hyphens(self, indent, tokens):
+        """Open an object list or give an empty list."""
+        if len(tokens) == 1:
+            self.events.append(('start_list', tokens[0]))
+            self._stack.append((OBJECT_LIST, indent))
+        elif len(tokens) == 2 and tokens[1].type is TT.hyphen:
+            self.events.append(('start_list', tokens[0]))
+            self.events.append(('end_list', None))
+            self._value_done()
+        else:
+            raise ParseError('newline', tokens[1])
+
+    def _key(self, indent, tokens):
+        """Parse a key and any value on the same line."""
+        if len(tokens) < 2 or tokens[1].type is not TT.colon:
+            raise ParseError(
+                "':'", tokens[1] if len(tokens) > 1 else _end_token
+            )
+
+        self.events.append(('key', tokens[0]))
+        rest = tokens[2:]
+        if not rest:
+            self._expect_value = True
+        elif rest[0].type is TT.hyphen:
+            self._hyphens(indent, rest)
+        elif rest[0].type not in _literals:
+            raise ParseError('value', rest[0])
+        elif len(rest) == 1:
+            self.events.append(('value', rest[0]))
+        else:
+            self._comma_list(rest)
+
+    def _comma_list(self, tokens):
+        """Parse a comma separated list of literals."""
+        self.events.append(('start_list', tokens[0]))
+        for (i, token) in enumerate(tokens):
+            if i % 2 == 0:
+                if token.type not in _literals:
+                    raise ParseError('literal', token)
+                self.events.append(('value', token))
+            elif token.type is not TT.comma:
+                raise ParseError('comma or newline', token)
+        self.events.append(('end_list', None))
+
+    def _continue(self, indent, tokens):
+        """Parse a line inside the innermost open container."""
+        typ = tokens[0].type
+        while self._stack:
+            kind, container_indent = self._stack[-1]
+            if kind is OBJECT:
+                # like Parser, an unindented object also ends at a deeper line
+                if (
+                    typ is TT.hyphen or indent < container_indent or
+                    container_indent == 0 < indent
+                ):
+                    self._pop()
+                elif typ is TT.id and indent == container_indent:
+                    self._key(indent, tokens)
+                    return
+                else:
+                    raise ParseError("identifier or '-'", tokens[0])
+            elif kind is LIST:
+                if indent < container_indent or typ is TT.id:
+                    self._pop()
+                elif typ not in _literals and typ is not TT.hyphen:
+                    raise ParseError('literal', tokens[0])
+                elif indent > container_indent:
+                    self.events.append(('start_list', tokens[0]))
+                    self._stack.append((LIST, indent))
+                else:
+                    self._list_item(tokens)
+                    return
+            else:
+                if typ is TT.id:
+                    self.events.append(('start_object', tokens[0]))
+                    self._stack.append((OBJECT, indent))
+                    self._key(indent, tokens)
+                elif typ is TT.hyphen and len(tokens) == 1:
+                    self._pop()
+                    self._value_done()
+                elif typ is not TT.hyphen or len(tokens) != 2:
+                    raise ParseError("identifier or '-'", tokens[0])
+                return
+
+        self._value_done()
+
+    def _list_item(self, tokens):
+        """Parse a line of a newline separated list."""
+        if tokens[0].type is TT.hyphen:
+            if len(tokens) == 2 and tokens[1].type is TT.hyphen:
+                self.events.append(('start_list', tokens[0]))
+                self.events.append(('end_list', None))
+            elif len(tokens) != 1:
+                raise ParseError('newline', tokens[1])
+        elif len(tokens) == 1:
+            self.events.append(('value', tokens[0]))
+        else:
+            self._comma_list(tokens)
+
+
+def events(source):
+    """Yield (event, token) pairs for a Hip document.
+
+    Values are left as tokens so that they are only decoded if needed.
+    """
+    parser = EventParser()
+    for (indent, tokens) in lines(lex(source)):
+        parser.feed(indent, tokens)
+        yield from parser.events
+        del parser.events[:]
+        if parser.done:
+            return
+
+    parser.close()
+    yield from parser.events
+
+
+def iterparse(source):
+    """Yield (event, value) pairs for a Hip document.
+
+    source is a string, a text file object or an iterable of chunks. The
+    events are 'start_object', 'key', 'value', 'start_list', 'end_list' and
+    'end_object', value is the key or the decoded value for 'key' and
+    'value' events and None otherwise.
+    """
+    for (event, token) in events(source):
+        if event == 'key' or event == 'value':
+            yield event, token.value
+        else:
+            yield event, None
+
+
+def build(pairs):
+    """Build the first complete value from an iterator of (event, token) pairs.
+
+    Containers are built on an explicit stack so that deeply nested values
+    don't hit the recursion limit. Only the events of that value are
+    consumed.
+    """
+    stack = []
+    keys = []
+    for (event, token) in pairs:
+        if event == 'value':
+            value = token.value
+        elif event == 'key':
+            keys.append(token.value)
+            continue
+        elif event == 'start_object':
+            stack.append({})
+            continue
+        elif event == 'start_list':
+            stack.append([])
+            continue
+        else:
+            value = stack.pop()
+
+        if not stack:
+            return value
+        elif type(stack[-1]) is dict:
+            stack[-1][keys.pop()] = value
+        else:
+            stack[-1].append(value)
+
+    raise ParseError('value', _end_token)
+
+
+def decode(source):
+    """Decode a Hip document in a single pass without recursion.
+
+    Lines are parsed against an explicit indentation stack, so the depth of
+    the document is only limited by memory.
+    """
+    return build(events(source))
+
+
+def iter_decode(source):
+    """Yield the items of a top-level list, one at a time.
+
+    Meant for top-level object lists, each record is yielded as soon as it
+    is complete and nothing of it is kept afterwards.
+    """
+    pairs = events(source)
+    (event, token) = next(pairs, ('end', _end_token))
+    if event != 'start_list':
+        raise ParseError("'-'", token or _end_token)
+
+    for (event, token) in pairs:
+        if event == 'end_list':
+            return
+        yield build(itertools.chain([(event, token)], pairs))
+
+
+def _skip(pairs):
+    """Consume the events of a started container without building it."""
+    depth = 1
+    for (event, token) in pairs:
+        if event == 'start_object' or event == 'start_list':
+            depth += 1
+        elif event == 'end_object' or event == 'end_list':
+            depth -= 1
+            if not depth:
+                return
+
+
+def _descend(value, steps, missing):
+    """Return the value at steps inside a built value, missing if it isn't.
+
+    Like the events, list items are only found by their plain index.
+    """
+    for step in steps:
+        if type(value) is dict and step in value:
+            value = value[step]
+        elif (type(value) is list and step.isdigit()
+                and str(int(step)) == step and int(step) < len(value)):
+            value = value[int(step)]
+        else:
+            return missing
+    return value
+
+
+def split_path(path):
+    """Return a path such as 'a.b.0.c' as a tuple of strings.
+
+    path can also be a tuple of keys and list indexes.
+    """
+    if isinstance(path, str):
+        return tuple(path.split('.'))
+    else:
+        return tuple(str(step) for step in path)
+
+
+def get_many(source, paths, default=None):
+    """Return a dict mapping each of paths to its value in a Hip document.
+
+    Only the containers along the paths are followed, everything else is
+    skipped by its events without decoding or building any of it, and
+    reading stops as soon as the last path is found. A path which isn't in
+    the document maps to default. Unlike decode(), a key which appears more
+    than once in an object gives its first value, its later values are
+    skipped like any other.
+    """
+    wanted = {}
+    for path in paths:
+        wanted.setdefault(split_path(path), []).append(path)
+    prefixes = {steps[:i] for steps in wanted for i in range(len(steps))}
+    found = {}
+    followed = set()
+    missing = object()
+
+    pairs = events(source)
+    # the path of each open container being followed and, for lists, the
+    # index of the next item
+    stack = []
+    location = ()
+    try:
+        for (event, token) in pairs:
+            if event == 'key':
+                location = stack[-1][0] + (token.value,)
+                continue
+            elif event == 'end_object' or event == 'end_list':
+                stack.pop()
+            elif location in found or location in followed:
+                # a repeated key, only its first value counts
+                if event != 'value':
+                    _skip(pairs)
+            elif location in wanted:
+                if event == 'value':
+                    found[location] = token.value
+                else:
+                    value = found[location] = build(
+                        itertools.chain([(event, token)], pairs)
+                    )
+                    # the paths inside it were consumed with it
+                    depth = len(location)
+                    for steps in wanted:
+                        if len(steps) > depth and steps[:depth] == location:
+                            inner = _descend(value, steps[depth:], missing)
+                            if inner is not missing:
+                                found[steps] = inner
+                if len(found) == len(wanted):
+                    break
+            elif event == 'value':
+                pass
+            elif location in prefixes:
+                followed.add(location)
+                if event == 'start_list':
+                    stack.append([location, 0])
+                    location += ('0',)
+                else:
+                    stack.append([location, None])
+                continue
+            else:
+                _skip(pairs)
+
+            if not stack:
+                break
+            frame = stack[-1]
+            if frame[1] is not None:
+                frame[1] += 1
+                location = frame[0] + (str(frame[1]),)
+    finally:
+        pairs.close()
+
+    return {
+        path: found.get(steps, default)
+        for (steps, paths) in wanted.items() for path in paths
+    }
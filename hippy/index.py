@@ -0,0 +1,231 @@
+"""Random access into large Hip files through an offset index.
+
+The index is kept next to the file, in the same path with a .hipx
+extension, behind the same header as a .hipc sidecar. It holds the byte
+span and line of each record of a top-level object list or each key of a
+top-level object, and optionally maps the values of some keys of the
+records to the records holding them.
+"""
+import os
+import array
+import hashlib
+import marshal
+
+from . import events
+from .lexer import Lexer
+from .parser import Parser
+from . import lazy, sidecar
+
+
+MAGIC = b'HIPX'
+VERSION = 1
+
+# values of secondary keys which can be indexed
+_hashable = (str, int, float, bool, type(None))
+
+
+def _entry(value):
+    """Return what a secondary key's value is filed under.
+
+    The type is part of it so that 1, 1.0 and yes are told apart.
+    """
+    return (type(value).__name__, value)
+
+
+def index_path(file_name):
+    """Return the path of the index for a Hip file."""
+    if file_name.endswith('.hip'):
+        return file_name + 'x'
+    else:
+        return file_name + '.hipx'
+
+
+def _offsets(raw, text, positions):
+    """Return the byte offsets in raw of ascending positions in text."""
+    if len(raw) == len(text):
+        return list(positions)
+
+    offsets = []
+    last = 0
+    offset = 0
+    for position in positions:
+        offset += len(text[last:position].encode('utf-8'))
+        offsets.append(offset)
+        last = position
+    return offsets
+
+
+def _index(raw, keys):
+    """Return the index of the UTF-8 contents of a Hip file."""
+    text = raw.decode('utf-8')
+    content = text.replace('\t', ' ').strip()
+    children = lazy.split(content)
+    if children is None:
+        children = lazy.split_events(content)
+    if not children:
+        raise ValueError(
+            'Only top-level objects and object lists can be indexed'
+        )
+
+    # the spans are in the stripped text
+    lead = len(text) - len(text.lstrip())
+    is_list = type(children[0][0]) is not str
+    spans = [child[-3:-1] for child in children]
+    starts = _offsets(raw, text, [lead + start for (start, _) in spans])
+    ends = _offsets(raw, text, [lead + end for (_, end) in spans])
+
+    secondary = {key: {} for key in keys}
+    if is_list and keys:
+        missing = object()
+        for (number, (start, end)) in enumerate(spans):
+            values = events.get_many(content[start:end], keys, missing)
+            for (key, value) in values.items():
+                if type(value) in _hashable:
+                    entries = secondary[key]
+                    entries.setdefault(_entry(value), []).append(number)
+
+    lines = [child[-1] for child in children]
+    return {
+        'list': is_list,
+        'keys': None if is_list else [child[0] for child in children],
+        'starts': array.array('q', starts).tobytes(),
+        'ends': array.array('q', ends).tobytes(),
+        'lines': array.array('q', lines).tobytes(),
+        'secondary': secondary,
+    }
+
+
+def _build(file_name, keys):
+    """Write the index of a Hip file and return it."""
+    info = os.stat(file_name)
+    with open(file_name, 'rb') as f:
+        raw = f.read()
+    index = _index(raw, tuple(keys))
+    sidecar.dump(
+        index_path(file_name), info, hashlib.sha1(raw).digest(), index,
+        MAGIC, VERSION,
+    )
+    return index
+
+
+def build_index(file_name, keys=()):
+    """Write the index of a Hip file, see open_indexed to read through it.
+
+    The file must be a top-level object or object list, keys names keys of
+    the records which IndexedFile.find() can look records up by. Where the
+    top level can't be told from the lines at the start of the line the
+    whole file is parsed, so syntax errors are raised here rather than when
+    a record is read.
+    """
+    _build(file_name, keys)
+
+
+def open_indexed(file_name, keys=None):
+    """Return an IndexedFile for a Hip file, building its index if needed.
+
+    The index is used as long as the file's mtime and size match or, failing
+    that, its contents still hash the same, otherwise it is built again
+    with the same secondary keys or keys if they are given.
+    """
+    path = index_path(file_name)
+    info = os.stat(file_name)
+    loaded = sidecar.load(path, (MAGIC, VERSION, marshal.version))
+    if loaded is not None:
+        (header, index) = loaded
+        if keys is None:
+            keys = tuple(index['secondary'])
+        if set(keys) == set(index['secondary']):
+            if header[3:5] == (info.st_mtime_ns, info.st_size):
+                return IndexedFile(file_name, index)
+
+            with open(file_name, 'rb') as f:
+                digest = hashlib.sha1(f.read()).digest()
+            if header[5] == digest:
+                # only touched, the index just needs the new mtime
+                sidecar.dump(path, info, digest, index, MAGIC, VERSION)
+                return IndexedFile(file_name, index)
+
+    return IndexedFile(file_name, _build(file_name, keys or ()))
+
+
+class IndexedFile:
+
+    """Reads single records or values of a Hip file through its index.
+
+    For a top-level object list items are looked up by record number, for
+    a top-level object by key. Each is read from its byte span and parsed
+    on every access, nothing is cached. The file is kept open until
+    close() is called, an IndexedFile is also a context manager.
+    """
+
+    def __init__(self, file_name, index):
+        """Open the file the index was built from."""
+        self.file_name = file_name
+        self.is_list = index['list']
+        self._starts = array.array('q')
+        self._starts.frombytes(index['starts'])
+        self._ends = array.array('q')
+        self._ends.frombytes(index['ends'])
+        self._lines = array.array('q')
+        self._lines.frombytes(index['lines'])
+        self._secondary = index['secondary']
+        if self.is_list:
+            self._positions = None
+        else:
+            # like a dict, the last of a repeated key wins
+            self._positions = {
+                key: i for (i, key) in enumerate(index['keys'])
+            }
+        self._file = open(file_name, 'rb')
+
+    def __enter__(self):
+        """Return the open file."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the file."""
+        self.close()
+
+    def __len__(self):
+        """Return the number of records or keys."""
+        if self.is_list:
+            return len(self._starts)
+        else:
+            return len(self._positions)
+
+    def __iter__(self):
+        """Iterate over the records or keys."""
+        if self.is_list:
+            return (self[i] for i in range(len(self._starts)))
+        else:
+            return iter(self._positions)
+
+    def __contains__(self, key):
+        """Return True if key is a key of a top-level object."""
+        return not self.is_list and key in self._positions
+
+    def __getitem__(self, item):
+        """Return record number item or the value of key item."""
+        if self.is_list:
+            return self._parse(range(len(self._starts))[item])
+        else:
+            return self._parse(self._positions[item])[item]
+
+    def find(self, key, value):
+        """Return the records whose secondary key is value."""
+        try:
+            numbers = self._secondary[key].get(_entry(value), ())
+        except KeyError:
+            raise KeyError('{} is not an indexed key'.format(repr(key)))
+        return [self._parse(number) for number in numbers]
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+    def _parse(self, i):
+        """Read and parse the i'th span."""
+        self._file.seek(self._starts[i])
+        raw = self._file.read(self._ends[i] - self._starts[i])
+        # number the lines as in the whole file
+        return Parser(Lexer(raw.decode('utf-8'), self._lines[i])).data
@@ -0,0 +1,261 @@
+"""Lazy documents which only parse the parts of a Hip string that are used.
+
+A quick pass over the lines at the start of the line finds the keys of a
+top-level object or the records of a top-level object list and the span of
+text each of them takes up. The text of a child is only lexed and parsed
+the first time it is accessed and the result is kept.
+"""
+import re
+import collections.abc
+
+from . import events
+from .lexer import Lexer
+from .parser import Parser
+
+
+# A line at the start of the line: a key and the rest of its line, a bare
+# '-' or '--' of an object list or anything else, which isn't split up. Keys
+# starting like a literal are lexed as one and left to the parser.
+_top_line = re.compile(
+    r'^(?:((?!yes|no|nil)[^\W\d]\w*)[ \t]*:([^\r\n]*)'
+    r'|(--?)\r?$'
+    r'|[^ \t\r\n#])',
+    re.M,
+)
+_indented = re.compile(r'^[ \t]+\S', re.M)
+# whitespace only lines change the parser's idea of the indentation and
+# lone carriage returns are line breaks the line patterns don't see
+_unsafe = re.compile(r'^[ \t]+\r?$|\r(?!\n)', re.M)
+# hyphens ending a line after a literal or the '--' of an empty list item
+# close the list and, like a '--' line, the record they are in
+_closing = re.compile(r'(?:[^\s-]-|---)-*[ \t]*(?:#[^\r\n]*)?\r?$', re.M)
+# line breaks as Lexer counts them
+_lbreak = re.compile(r'\r\n|\r|\n')
+
+
+class _Span:
+
+    """The text of a child which hasn't been parsed yet."""
+
+    __slots__ = ('start', 'end', 'line')
+
+    def __init__(self, start, end, line):
+        """Set where the child is in the document and its first line."""
+        self.start = start
+        self.end = end
+        self.line = line
+
+
+def _opens_value(rest):
+    """Return True if the rest of a key's line leaves its value to follow.
+
+    None is returned for an object list starting on the key's line.
+    """
+    rest = rest.strip()
+    if not rest or rest.startswith('#'):
+        return True
+    elif rest[0] == '-' and rest[1:2] in ('', ' ', '\t', '#'):
+        return None
+    else:
+        return False
+
+
+def split(content):
+    """Return the children of a top-level object or object list.
+
+    Returns a list of (key, start, end, line) for an object and of (start,
+    end, line) for an object list, where line is the number of the child's
+    first line, or None if content is anything else or the parser might not
+    see the lines at the start of the line as its top level.
+    """
+    if _unsafe.search(content) or _closing.search(content):
+        return None
+    lines = list(_top_line.finditer(content))
+    if not lines:
+        return None
+    is_list = lines[0].group(3) == '-'
+    if is_list:
+        if len(lines) < 2 or lines[-1].group(3) != '-':
+            return None
+        # the closing line is only needed as the end of the last record
+        bounds = [line.start() for line in lines[1:]]
+        lines = lines[:-1]
+    else:
+        bounds = [line.start() for line in lines[1:]] + [len(content)]
+
+    children = []
+    record = None
+    number = 0
+    last = 0
+    for (line, end) in zip(lines, bounds):
+        (key, rest, hyphens) = line.groups()
+        number += content.count('\n', last, line.start())
+        last = line.start()
+        if key is not None:
+            follows = _opens_value(rest)
+            if follows is None:
+                return None
+        elif is_list and (hyphens == '--' or line.start() == 0):
+            follows = False
+        else:
+            return None
+        # the value has to start on an indented line or the line has to be
+        # all there is before the next line at the start of the line
+        if bool(_indented.search(content, line.end(), end)) != follows:
+            return None
+
+        if not is_list:
+            children.append((key, line.start(), end, number))
+        elif key is None:
+            if record is not None:
+                children.append((record[0], line.start(), record[1]))
+            record = None
+        elif record is None:
+            record = (line.start(), number)
+    if record is not None:
+        children.append((record[0], bounds[-1], record[1]))
+
+    return children
+
+
+def split_events(content):
+    """Return the children of content like split(), found by its events.
+
+    This parses the whole document, for when split() gives up on records
+    that aren't told apart by bare '-' and '--' lines. Each child runs from
+    its first line up to the first line of the next. None is returned for
+    anything but an object or object list, or where the event parser might
+    read the top level differently from the parser.
+    """
+    if _unsafe.search(content):
+        return None
+    firsts = []
+    is_list = None
+    depth = 0
+    for (event, token) in events.events(content):
+        if depth == 1:
+            if event == 'key':
+                firsts.append((token.value, token.line))
+            elif is_list and event == 'start_object':
+                firsts.append((None, token.line))
+            elif is_list and event != 'end_list':
+                return None
+        if event == 'start_object' or event == 'start_list':
+            if not depth:
+                is_list = event == 'start_list'
+            depth += 1
+        elif event == 'end_object' or event == 'end_list':
+            depth -= 1
+    if not firsts:
+        return None
+
+    line_starts = [0] + [match.end() for match in _lbreak.finditer(content)]
+    bounds = [line_starts[line] for (_, line) in firsts] + [len(content)]
+    children = []
+    for (i, (key, line)) in enumerate(firsts):
+        if is_list:
+            children.append((bounds[i], bounds[i + 1], line))
+        else:
+            children.append((key, bounds[i], bounds[i + 1], line))
+    return children
+
+
+class _Lazy:
+
+    """Parses the spans of a document's children."""
+
+    def __init__(self, content):
+        """Keep the stripped document the spans point into."""
+        self._content = content
+
+    def _parse(self, span):
+        """Parse the text of a child."""
+        # number the lines as in the whole document
+        text = self._content[span.start:span.end]
+        return Parser(Lexer(text, span.line)).data
+
+
+class LazyMapping(_Lazy, collections.abc.Mapping):
+
+    """A top-level object whose values are parsed when first accessed."""
+
+    def __init__(self, content, children):
+        """Set the span of each key's line and value."""
+        super().__init__(content)
+        self._items = {}
+        for (key, start, end, line) in children:
+            self._items[key] = _Span(start, end, line)
+
+    def __getitem__(self, key):
+        """Return the value of key, parsing it the first time."""
+        value = self._items[key]
+        if type(value) is _Span:
+            value = self._items[key] = self._parse(value)[key]
+        return value
+
+    def __iter__(self):
+        """Iterate over the keys without parsing anything."""
+        return iter(self._items)
+
+    def __len__(self):
+        """Return the number of keys."""
+        return len(self._items)
+
+    def __repr__(self):
+        """Show the keys only."""
+        return '<LazyMapping with keys {}>'.format(list(self._items))
+
+
+class LazySequence(_Lazy, collections.abc.Sequence):
+
+    """A top-level object list whose records are parsed when accessed."""
+
+    def __init__(self, content, children):
+        """Set the span of each record."""
+        super().__init__(content)
+        self._items = [
+            _Span(start, end, line) for (start, end, line) in children
+        ]
+
+    def __getitem__(self, index):
+        """Return a record or list of records, parsing them the first time."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+
+        index = range(len(self._items))[index]
+        value = self._items[index]
+        if type(value) is _Span:
+            value = self._items[index] = self._parse(value)
+        return value
+
+    def __len__(self):
+        """Return the number of records."""
+        return len(self._items)
+
+    def __eq__(self, other):
+        """Compare the records with those of another sequence."""
+        if isinstance(other, (list, LazySequence)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Show the number of records only."""
+        return '<LazySequence of {} records>'.format(len(self._items))
+
+
+def decode(string):
+    """Return a lazy document for a Hip string.
+
+    Top-level objects become LazyMapping and top-level object lists
+    LazySequence, anything else or a document whose top level can't be
+    told from the lines at the start of the line is decoded right away.
+    Errors in a child are raised when it is accessed.
+    """
+    content = string.replace('\t', ' ').strip()
+    children = split(content)
+    if not children:
+        return Parser(Lexer(string)).data
+    elif type(children[0][0]) is str:
+        return LazyMapping(content, children)
+    else:
+        return LazySequence(content, children)
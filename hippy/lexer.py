@@ -3,8 +3,10 @@
 Also does stuff.
 """
 import re
-import ast
 import enum
+import unicodedata
+import functools
+from array import array
 from .error import Error
 
 
@@ -14,6 +16,7 @@ class LexError(Error):
 
     def __init__(self, line, char):
         """Set the line and character which caused the exception."""
+        super().__init__(line, char)
         self.line = line
         self.char = char
 
@@ -40,16 +43,191 @@ class TokenType(enum.Enum):
     id = 12
 
 
-def tokenize_number(val, line):
-    """Parse val correctly into int or float."""
-    try:
-        num = int(val)
-        typ = TokenType.int
-    except ValueError:
-        num = float(val)
-        typ = TokenType.float
+_float_chars = re.compile(r'[.eE]').search
 
-    return {'type': typ, 'value': num, 'line': line}
+
+def _number_type(val):
+    """Return whether val should be parsed as an int or a float."""
+    if _float_chars(val) is None:
+        return TokenType.int
+    else:
+        return TokenType.float
+
+
+# anything in a string which stops it being a plain slice of the source
+_special_chars = re.compile(r'[\\\r\n]').search
+
+_escapes = re.compile(r'''
+    \\(?:
+        ([\\'"abfnrtv])         # single character escapes
+        |x([0-9a-fA-F]{2})      # hexadecimal escapes
+        |u([0-9a-fA-F]{4})
+        |U([0-9a-fA-F]{8})
+        |N\{([^}]+)\}           # named unicode characters
+        |([0-7]{1,3})           # octal escapes
+        |(\r\n|\r|\n)           # escaped line breaks are dropped
+        |([xuUN])               # malformed escapes
+    )
+    |(\r|\n)                    # line breaks must be escaped
+''', re.VERBOSE)
+
+_simple_escapes = {
+    '\\': '\\', "'": "'", '"': '"', 'a': '\a', 'b': '\b', 'f': '\f',
+    'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+}
+
+
+def _unescape_match(match):
+    """Return the replacement for a single escape sequence."""
+    index = match.lastindex
+    if index == 1:
+        return _simple_escapes[match.group(1)]
+    elif index <= 4:
+        return chr(int(match.group(index), 16))
+    elif index == 5:
+        try:
+            return unicodedata.lookup(match.group(5))
+        except KeyError:
+            raise ValueError(
+                'Unknown unicode character name {}'.format(match.group(5))
+            )
+    elif index == 6:
+        return chr(int(match.group(6), 8))
+    elif index == 7:
+        return ''
+    elif index == 8:
+        raise ValueError('Malformed escape sequence \\{}'.format(
+            match.group(8)
+        ))
+    else:
+        raise ValueError('Unescaped line break in string')
+
+
+def _unescape(val):
+    """Replace the escape sequences in the body of a string.
+
+    Escapes follow the rules of Python string literals, unknown escapes are
+    left untouched.
+    """
+    return _escapes.sub(_unescape_match, val)
+
+
+def _decode_string(val):
+    """Return the value of a quoted string, only unescaping if needed."""
+    body = val[1:-1]
+    if _special_chars(body) is None:
+        return body
+    else:
+        return _unescape(body)
+
+
+_decoders = {
+    TokenType.str: _decode_string,
+    TokenType.int: int,
+    TokenType.float: float,
+    TokenType.bool: lambda val: val == 'yes',
+    TokenType.null: lambda val: None,
+    TokenType.comment: lambda val: val[1:].strip(),
+}
+
+# maps the integer codes stored in a TokenArray back to their TokenType
+_types = [None] * (max(t.value for t in TokenType) + 1)
+for _type in TokenType:
+    _types[_type.value] = _type
+
+
+class Token:
+
+    """A single token, its value is only decoded when it is asked for."""
+
+    __slots__ = ('type', 'text', 'line')
+
+    def __init__(self, type, text, line):
+        """Set the type, source text and line of the token."""
+        self.type = type
+        self.text = text
+        self.line = line
+
+    @property
+    def value(self):
+        """Return the Python value of the token."""
+        decoder = _decoders.get(self.type)
+        return self.text if decoder is None else decoder(self.text)
+
+    def __repr__(self):
+        """Show the type, text and line of the token."""
+        return 'Token({}, {!r}, {})'.format(self.type, self.text, self.line)
+
+
+class TokenArray:
+
+    """Stores a stream of tokens as parallel arrays.
+
+    Rather than keeping an object per token only the type code, the start and
+    end offsets into the source and the line number are kept, values are
+    decoded from the source when they are asked for.
+    """
+
+    def __init__(self, content):
+        """Create an empty array of tokens over content."""
+        self.content = content
+        self.types = array('B')
+        self.starts = array('Q')
+        self.ends = array('Q')
+        self.lines = array('L')
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Build a TokenArray from an iterable of Token objects."""
+        texts = []
+        self = cls(None)
+        pos = 0
+        for token in tokens:
+            self.types.append(token.type.value)
+            self.starts.append(pos)
+            pos += len(token.text)
+            self.ends.append(pos)
+            self.lines.append(token.line)
+            texts.append(token.text)
+        self.content = ''.join(texts)
+
+        return self
+
+    def __len__(self):
+        """Return the number of tokens."""
+        return len(self.types)
+
+    def __getitem__(self, i):
+        """Return the i-th token as a Token object."""
+        return Token(self.type(i), self.text(i), self.lines[i])
+
+    def type(self, i):
+        """Return the TokenType of the i-th token."""
+        return _types[self.types[i]]
+
+    def text(self, i):
+        """Return the source text of the i-th token."""
+        return self.content[self.starts[i]:self.ends[i]]
+
+    def value(self, i):
+        """Return the decoded value of the i-th token."""
+        typ = _types[self.types[i]]
+        if typ is TokenType.str:
+            # slice the body of the string straight out of the source
+            start = self.starts[i] + 1
+            end = self.ends[i] - 1
+            if _special_chars(self.content, start, end) is None:
+                return self.content[start:end]
+            else:
+                return _unescape(self.content[start:end])
+
+        decoder = _decoders.get(typ)
+        text = self.content[self.starts[i]:self.ends[i]]
+        return text if decoder is None else decoder(text)
+
+    def line(self, i):
+        """Return the line number of the i-th token."""
+        return self.lines[i]
 
 
 class Lexer:
@@ -59,110 +237,61 @@ class Lexer:
     And shit.
     """
 
+    # the order of this list is the order in which tokens are tried
     _token_map = [
         # TODO: these can probably be unified
         # TODO: this doesn't handle arbitrarily complex strings
         #   these would probably need to be handled in the parser
+        ('dq_str', r'"(?:[^\\"]|\\.)*"', TokenType.str),
+        ('sq_str', r"'(?:[^\\']|\\.)*'", TokenType.str),
         (
-            re.compile(r'"(?:[^\\"]|\\.)*"'),
-            lambda val, line: {
-                'type': TokenType.str,
-                'value': ast.literal_eval(val),
-                'line': line
-            },
-        ),
-        (
-            re.compile(r"'(?:[^\\']|\\.)*'"),
-            lambda val, line: {
-                'type': TokenType.str,
-                'value': ast.literal_eval(val),
-                'line': line
-            },
-        ),
-        (
-            re.compile(
-                r"""
-                    [-+]?
-                    (?:  # matches the significand
-                        (?:[0-9]+\.[0-9]*)|(?:[0-9]*\.[0-9]+)|(?:[0-9]+)
-                    )(?:  # matches the exponential
-                        [eE][-+]?[0-9]+
-                    )?
-                """,
-                re.VERBOSE,
-            ),
-            tokenize_number
-        ),
-        (
-            re.compile(r'yes'),
-            lambda val, line: {
-                'type': TokenType.bool, 'value': True, 'line': line
-            },
-        ),
-        (
-            re.compile(r'no'),
-            lambda val, line: {
-                'type': TokenType.bool, 'value': False, 'line': line
-            },
-        ),
-        (
-            re.compile(r'nil'),
-            lambda val, line: {
-                'type': TokenType.null, 'value': None, 'line': line
-            },
-        ),
-        (
-            re.compile(r'#.*'),
-            lambda val, line: {
-                'type': TokenType.comment,
-                'value': val[1:].strip(),
-                'line': line
-            },
-        ),
-        (
-            re.compile(r'(?:\r\n|\r|\n)'),
-            lambda val, line: {
-                'type': TokenType.lbreak, 'value': val, 'line': line
-            },
-        ),
-        (
-            re.compile(r'\s'),
-            lambda val, line: {
-                'type': TokenType.ws, 'value': val, 'line': line
-            },
-        ),
-        (
-            re.compile(r'-'),
-            lambda val, line: {
-                'type': TokenType.hyphen, 'value': val, 'line': line
-            },
-        ),
-        (
-            re.compile(r':'),
-            lambda val, line: {
-                'type': TokenType.colon, 'value': val, 'line': line
-            },
-        ),
-        (
-            re.compile(r','),
-            lambda val, line: {
-                'type': TokenType.comma, 'value': val, 'line': line
-            },
-        ),
-        (
-            re.compile(r'\w+'),
-            lambda val, line: {
-                'type': TokenType.id, 'value': val, 'line': line
-            },
+            'number',
+            r'[-+]?'
+            # matches the significand
+            r'(?:(?:[0-9]+\.[0-9]*)|(?:[0-9]*\.[0-9]+)|(?:[0-9]+))'
+            # matches the exponential
+            r'(?:[eE][-+]?[0-9]+)?',
+            # may turn out to be a float, see _number_type()
+            TokenType.int,
         ),
+        ('yes', r'yes', TokenType.bool),
+        ('no', r'no', TokenType.bool),
+        ('nil', r'nil', TokenType.null),
+        ('comment', r'#.*', TokenType.comment),
+        ('lbreak', r'(?:\r\n|\r|\n)', TokenType.lbreak),
+        ('ws', r'\s', TokenType.ws),
+        ('hyphen', r'-', TokenType.hyphen),
+        ('colon', r':', TokenType.colon),
+        ('comma', r',', TokenType.comma),
+        ('id', r'\w+', TokenType.id),
     ]
 
-    def __init__(self, content):
-        """Initialize lexer state."""
+    # A single alternation tried in the same order as _token_map, the name of
+    # the group that matched tells us which token was found.
+    _scanner = re.compile('|'.join(
+        '(?P<{}>{})'.format(name, rgx) for (name, rgx, _) in _token_map
+    ))
+    _token_types = {name: typ for (name, _, typ) in _token_map}
+
+    _token_array = TokenArray
+    _is_float = _float_chars
+
+    # all of the content is known up front, see StreamLexer
+    _eof = True
+    _lookahead = 0
+    _offset = 0
+    _consumed = None
+
+    def __init__(self, content, line=0):
+        """Initialize lexer state.
+
+        line is the number of the first line, for content taken from the
+        middle of a document.
+        """
         self._content = content.replace('\t', ' ').strip()
         self._length = len(self._content)
         self._pos = 0
-        self._line = 0
+        self._line = line
 
     def __iter__(self):
         """Return the object, since it is an iterator."""
@@ -173,15 +302,296 @@ class Lexer:
         if self._pos >= self._length:
             raise StopIteration
 
-        remaining = self._content[self._pos:]
-        for (rgx, func) in self._token_map:
-            match = rgx.match(remaining)
-            if match is not None:
-                token = func(match.group(0), self._line)
-                if token['type'] is TokenType.lbreak:
-                    self._line += 1
+        match = self._scanner.match(self._content, self._pos, self._length)
+        if match is None:
+            raise LexError(self._line, self._content[self._pos])
+
+        self._pos = match.end()
+        return self._token(match)
+
+    def _token(self, match):
+        """Build the token for a match of the scanner."""
+        text = self._match_text(match)
+        typ = self._token_types[match.lastgroup]
+        if typ is TokenType.int:
+            typ = _number_type(text)
+        token = Token(typ, text, self._line)
+        if typ is TokenType.lbreak:
+            self._line += 1
+
+        return token
+
+    def _match_text(self, match):
+        """Return the text of a match of the scanner."""
+        return match.group()
+
+    def tokenize(self, comments=True):
+        """Consume the remaining tokens into a TokenArray.
+
+        Comments are dropped from the array if comments is False.
+        """
+        tokens = self._token_array(None)
+        add_type = tokens.types.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        add_line = tokens.lines.append
+        codes = {
+            name: typ.value for (name, typ) in self._token_types.items()
+        }
+        number = codes['number']
+        float_code = TokenType.float.value
+        lbreak = codes['lbreak']
+        comment = None if comments else codes['comment']
+        match = self._scanner.match
+        is_float = self._is_float
+        base = self._start_array()
+
+        while True:
+            content = self._content
+            length = self._length
+            eof = self._eof
+            offset = self._offset - base
+            pos = self._pos
+            line = self._line
+            while pos < length:
+                m = match(content, pos, length)
+                if m is None:
+                    if eof:
+                        self._pos, self._line = pos, line
+                        raise LexError(line, content[pos])
+                    break
+
+                end = m.end()
+                if end + self._lookahead > length and not eof:
+                    break
+
+                code = codes[m.lastgroup]
+                if code == number and is_float(content, pos, end):
+                    code = float_code
+                if code != comment:
+                    add_type(code)
+                    add_start(offset + pos)
+                    add_end(offset + end)
+                    add_line(line)
+                if code == lbreak:
+                    line += 1
+                pos = end
+
+            self._pos, self._line = pos, line
+            if eof:
+                break
+            self._fill()
+
+        tokens.content = self._array_content()
+
+        return tokens
+
+    def _start_array(self):
+        """Prepare to tokenize into an array, returning its base offset.
+
+        Offsets in the array are relative to the current position, the
+        content of the array is built up from here.
+        """
+        if self._pos:
+            self._offset += self._pos
+            self._content = self._content[self._pos:]
+            self._length -= self._pos
+            self._pos = 0
+        self._consumed = []
+
+        return self._offset
+
+    def _array_content(self):
+        """Return the content the offsets in the array point into."""
+        self._consumed.append(self._content[:self._pos])
+        content = ''.join(self._consumed)
+        self._consumed = None
+
+        return content
+
+
+class StreamLexer(Lexer):
+
+    """Tokenizes a text file object or an iterable of chunks incrementally.
+
+    Produces exactly the same tokens as Lexer would for the concatenated
+    input, while only holding the current chunk and any token which spans
+    the chunk boundary in memory.
+    """
+
+    # characters a pattern may need to see past the end of its match
+    _lookahead = 3
+
+    def __init__(self, source, chunk_size=65536):
+        """Initialize lexer state, source is a file object or iterable."""
+        if hasattr(source, 'read'):
+            source = iter(functools.partial(source.read, chunk_size), '')
+        self._chunks = iter(source)
+        self._content = ''
+        self._offset = 0
+        self._pos = 0
+        # the buffer past this point is whitespace which may yet turn out
+        # to be the end of the input, where Lexer would have stripped it
+        self._length = 0
+        self._started = False
+        self._eof = False
+        self._line = 0
+
+    def _fill(self):
+        """Append chunks to the unconsumed part of the buffer.
+
+        Chunks are read until they add at least as much as is left
+        unconsumed, so a token which keeps failing to match, such as an
+        unterminated string, is only scanned again once the buffer doubled.
+        """
+        pending = len(self._content) - self._pos
+        chunks = []
+        size = 0
+        for chunk in self._chunks:
+            if chunk:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= pending:
+                    break
+        else:
+            self._eof = True
+            if not chunks:
+                return
+        chunk = ''.join(chunks)
+
+        if self._consumed is not None:
+            self._consumed.append(self._content[:self._pos])
+        self._offset += self._pos
+        self._content = self._content[self._pos:] + chunk.replace('\t', ' ')
+        self._pos = 0
+        if not self._started:
+            self._content = self._content.lstrip()
+            self._started = bool(self._content)
+        self._length = len(self._content.rstrip())
+
+    def __next__(self):
+        """Retrieve the next token, reading more input when needed."""
+        while True:
+            if self._pos < self._length:
+                match = self._scanner.match(
+                    self._content, self._pos, self._length
+                )
+                # a token close to the end of the buffer may continue in the
+                # next chunk, e.g. '1.5' could become '1.5e-3'
+                if match is not None and (
+                    match.end() + self._lookahead <= self._length or self._eof
+                ):
+                    self._pos = match.end()
+                    return self._token(match)
+                elif self._eof:
+                    raise LexError(self._line, self._content[self._pos])
+            elif self._eof:
+                raise StopIteration
+
+            self._fill()
+
+
+class BytesTokenArray(TokenArray):
+
+    """A TokenArray over UTF-8 bytes, such as a memory mapped file.
+
+    Only the tokens whose text or value is asked for are decoded, tabs are
+    turned into spaces as Lexer would have done.
+    """
+
+    def text(self, i):
+        """Return the decoded source text of the i-th token."""
+        text = self.content[self.starts[i]:self.ends[i]].decode('utf-8')
+        return text.replace('\t', ' ')
+
+    def value(self, i):
+        """Return the decoded value of the i-th token."""
+        typ = _types[self.types[i]]
+        if typ is TokenType.str:
+            body = self.content[self.starts[i] + 1:self.ends[i] - 1]
+            return _unescape_bytes(body)
+
+        decoder = _decoders.get(typ)
+        text = self.text(i)
+        return text if decoder is None else decoder(text)
+
+
+def _unescape_bytes(body):
+    """Return the value of the UTF-8 body of a string."""
+    val = body.decode('utf-8').replace('\t', ' ')
+    if _special_chars(val) is None:
+        return val
+    else:
+        return _unescape(val)
+
+
+def _bytes_pattern(name, rgx):
+    """Return the bytes version of a pattern from Lexer._token_map."""
+    if name == 'id':
+        # the bytes of any non-ASCII character count as word characters
+        rgx = r'(?:\w|[\x80-\xff])+'
+    return '(?P<{}>{})'.format(name, rgx).encode('latin-1')
+
+
+class BytesLexer(Lexer):
+
+    """Tokenizes UTF-8 bytes in place, without decoding them first.
+
+    content can be bytes or any object supporting slicing and the buffer
+    protocol, such as an mmap. The tokens keep offsets into content and
+    only their values are decoded. Unlike Lexer only ASCII whitespace is
+    treated as whitespace and any non-ASCII character is allowed in an
+    identifier.
+    """
+
+    _scanner = re.compile(b'|'.join(
+        _bytes_pattern(name, rgx) for (name, rgx, _) in Lexer._token_map
+    ))
+    _token_array = BytesTokenArray
+    _is_float = re.compile(rb'[.eE]').search
+    _ws = b' \t\n\r\x0b\x0c'
+
+    def __init__(self, content):
+        """Initialize lexer state, skipping surrounding whitespace."""
+        self._content = content
+        start = 0
+        end = len(content)
+        while start < end and content[start] in self._ws:
+            start += 1
+        while end > start and content[end - 1] in self._ws:
+            end -= 1
+        self._pos = start
+        self._length = end
+        self._line = 0
+
+    def _match_text(self, match):
+        """Return the decoded text of a match of the scanner."""
+        return match.group().decode('utf-8').replace('\t', ' ')
+
+    def __next__(self):
+        """Retrieve the next token."""
+        try:
+            return super().__next__()
+        except LexError as error:
+            raise self._lex_error(error)
+
+    def tokenize(self, comments=True):
+        """Consume the remaining tokens into a BytesTokenArray."""
+        try:
+            return super().tokenize(comments)
+        except LexError as error:
+            raise self._lex_error(error)
+
+    def _lex_error(self, error):
+        """Give the error the character rather than the byte it failed on."""
+        chunk = bytes(self._content[self._pos:self._pos + 4])
+        error.char = chunk.decode('utf-8', 'replace')[:1]
+        return error
 
-                self._pos += match.end(0)
-                return token
+    def _start_array(self):
+        """Keep offsets into the whole of content."""
+        return 0
 
-        raise LexError(self._line, self._content[self._pos])
+    def _array_content(self):
+        """Return content itself, nothing is copied."""
+        return self._content
@@ -1,6 +1,9 @@
 """Contains Parser class responsible for parsing string into data structure."""
+import re
+import collections
+
 from .error import Error
-from .lexer import TokenType as TT
+from .lexer import Lexer, Token, TokenArray, TokenType as TT
 
 
 class ParseError(Error):
@@ -9,9 +12,10 @@ class ParseError(Error):
 
     def __init__(self, expected, found):
         """Set expected and found values."""
+        super().__init__(expected, found)
         self.expected = expected
-        self.found = found['value']
-        self.line = found['line']
+        self.found = found.value
+        self.line = found.line
 
     def __str__(self):
         """Give a nice predetermined error message."""
@@ -20,6 +24,19 @@ class ParseError(Error):
         )
 
 
+def _type_class(*types):
+    """Return a matcher for a run of the given type codes, possibly empty."""
+    return re.compile(
+        b'[' + re.escape(bytes(t.value for t in types)) + b']*'
+    ).match
+
+
+_ws_run = _type_class(TT.ws)
+_literal_run = _type_class(TT.ws, TT.str, TT.int, TT.float, TT.bool, TT.null)
+_blank_run = _type_class(TT.lbreak, TT.ws)
+_lbreak_code = bytes([TT.lbreak.value])
+
+
 class Parser:
 
     """Parses an iterable of tokens into a data structure."""
@@ -34,14 +51,24 @@ class Parser:
     # -----------------------------
     # HERE BE DRAGONS
 
+    _end_token = Token(None, None, -1)
+
     def __init__(self, tokens):
         """Initialize tokens excluding comments."""
-        self.tokens = [t for t in tokens if t['type'] is not TT.comment]
+        if isinstance(tokens, TokenArray):
+            self.tokens = tokens
+        elif isinstance(tokens, Lexer):
+            self.tokens = tokens.tokenize(comments=False)
+        else:
+            self.tokens = TokenArray.from_tokens(
+                t for t in tokens if t.type is not TT.comment
+            )
         self.num_tokens = len(self.tokens)
         self._cur_position = 0
         self._finished = False
         self._data = None
         self._literals = (TT.str, TT.int, TT.float, TT.bool, TT.null)
+        self._types = None
 
     @property
     def data(self):
@@ -57,21 +84,93 @@ class Parser:
     def _cur_token(self):
         """Return the current token."""
         if self._finished:
-            return {'value': None, 'type': None, 'line': -1}
+            return self._end_token
         else:
-            return self.tokens[self._cur_position]
+            return self._token_at(self._cur_position)
+
+    @property
+    def _cur_type(self):
+        """Return the type of the current token."""
+        if self._finished:
+            return None
+        else:
+            return self._type_at(self._cur_position)
+
+    @property
+    def _cur_value(self):
+        """Return the value of the current token."""
+        if self._finished:
+            return None
+        else:
+            return self._value_at(self._cur_position)
 
     def _nth_token(self, n=1):
         """Return token n tokens ahead of the current token."""
-        try:
-            return self.tokens[self._cur_position + n]
-        except IndexError:
-            return {'value': None, 'type': None, 'line': -1}
+        if self._has(self._cur_position + n):
+            return self._token_at(self._cur_position + n)
+        else:
+            return self._end_token
+
+    def _nth_type(self, n=1):
+        """Return the type of the token n tokens ahead of the current one."""
+        if self._has(self._cur_position + n):
+            return self._type_at(self._cur_position + n)
+        else:
+            return None
+
+    def _has(self, position):
+        """Return whether there is a token at an absolute position."""
+        return position < self.num_tokens
+
+    def _token_at(self, position):
+        """Return the token at an absolute position."""
+        return self.tokens[position]
+
+    def _type_at(self, position):
+        """Return the type of the token at an absolute position."""
+        return self.tokens.type(position)
+
+    def _value_at(self, position):
+        """Return the value of the token at an absolute position."""
+        return self.tokens.value(position)
+
+    def _build_tables(self):
+        """Take the type codes of the whole document as a byte string.
+
+        Each peek ahead over whitespace, literals or blank lines is then a
+        single regex match over the codes instead of a rescan of the tokens.
+        """
+        self._types = self.tokens.types.tobytes()
+        self._last = len(self._types) - 1
+
+    def _count_ws(self, position):
+        """Return the number of whitespace tokens from position."""
+        return min(_ws_run(self._types, position).end(), self._last) - position
+
+    def _skip_literals(self, position):
+        """Return the position after any whitespace and literals."""
+        return min(_literal_run(self._types, position).end(), self._last)
+
+    def _skip_blank(self, position):
+        """Return the position after any line breaks and whitespace."""
+        return min(_blank_run(self._types, position).end(), self._last)
+
+    def _next_indent(self, position):
+        """Return the indent of the next line after position.
+
+        Line breaks and whitespace from position are skipped, the indent is
+        the whitespace since the last line break.
+        """
+        end = self._skip_blank(position)
+        lbreak = self._types.rfind(_lbreak_code, position, end)
+        if lbreak == -1:
+            return end - position
+        else:
+            return end - lbreak - 1
 
     def _increment(self, n=1):
         """Move forward n tokens in the stream."""
-        if self._cur_position >= self.num_tokens-1:
-            self._cur_positon = self.num_tokens - 1
+        if not self._has(self._cur_position + 1):
             self._finished = True
         else:
             self._cur_position += n
@@ -79,7 +178,7 @@ class Parser:
     def _skip_whitespace(self):
         """Increment over whitespace, counting characters."""
         i = 0
-        while self._cur_token['type'] is TT.ws and not self._finished:
+        while self._cur_type is TT.ws and not self._finished:
             self._increment()
             i += 1
 
@@ -87,12 +186,14 @@ class Parser:
 
     def _skip_newlines(self):
         """Increment over newlines."""
-        while self._cur_token['type'] is TT.lbreak and not self._finished:
+        while self._cur_type is TT.lbreak and not self._finished:
             self._increment()
 
     def _parse(self):
         """Parse the token stream into a nice dictionary data structure."""
-        while self._cur_token['type'] in (TT.ws, TT.lbreak):
+        self._build_tables()
+
+        while self._cur_type in (TT.ws, TT.lbreak):
             self._skip_whitespace()
             self._skip_newlines()
 
@@ -103,15 +204,15 @@ class Parser:
     def _parse_value(self):
         """Parse the value of a key-value pair."""
         indent = 0
-        while self._cur_token['type'] is TT.ws:
+        while self._cur_type is TT.ws:
             indent = self._skip_whitespace()
             self._skip_newlines()
 
-        if self._cur_token['type'] is TT.id:
+        if self._cur_type is TT.id:
             return self._parse_key(indent)
-        elif self._cur_token['type'] is TT.hyphen:
+        elif self._cur_type is TT.hyphen:
             self._increment()
-            if self._cur_token['type'] is TT.hyphen:
+            if self._cur_type is TT.hyphen:
                 self._increment()
                 return []
             else:
@@ -127,11 +228,10 @@ class Parser:
         new_indent = indent
         while not self._finished and new_indent == indent:
             self._skip_whitespace()
-            cur_token = self._cur_token
-            if cur_token['type'] is TT.id:
-                key = cur_token['value']
-                next_token = self._nth_token()
-                if next_token['type'] is TT.colon:
+            cur_type = self._cur_type
+            if cur_type is TT.id:
+                key = self._cur_value
+                if self._nth_type() is TT.colon:
                     self._increment(2)  # move past the ':'
                     # whitespace before a newline is not important
                     # whitespace after a newline is important
@@ -139,27 +239,20 @@ class Parser:
                     self._skip_newlines()
                     data[key] = self._parse_value()
                 else:
-                    raise ParseError("':'", next_token)
+                    raise ParseError("':'", self._nth_token())
             else:
-                if cur_token['type'] is TT.hyphen:
+                if cur_type is TT.hyphen:
                     return data
                 else:
-                    raise ParseError("identifier or '-'", cur_token)
+                    raise ParseError("identifier or '-'", self._cur_token)
 
-            if self.tokens[self._cur_position - 1]['type'] is not TT.lbreak:
+            if self._type_at(self._cur_position - 1) is not TT.lbreak:
                 # skip whitespace at the end of the line
                 self._skip_whitespace()
                 self._skip_newlines()
 
             # find next indentation level without incrementing
-            new_indent = 0
-            temp_position = self._cur_position
-            while (
-                temp_position < self.num_tokens-1 and
-                self.tokens[temp_position]['type'] is TT.ws
-            ):
-                temp_position += 1
-                new_indent += 1
+            new_indent = self._count_ws(self._cur_position)
 
         if indent == 0 or new_indent < indent:
             return data
@@ -167,7 +260,7 @@ class Parser:
             raise Exception(
                 "Parser screwed up, increase of indent on line {} should "
                 "have been caught by _parse_value().".format(
-                    cur_token['line']
+                    self._cur_token.line
                 )
             )
 
@@ -178,15 +271,19 @@ class Parser:
         indent = 0
         while not self._finished:
             self._skip_newlines()
-            if self._cur_token['type'] is TT.ws:
-                while self._cur_token['type'] is TT.ws:
+            if self._cur_type is TT.ws:
+                while self._cur_type is TT.ws:
                     indent = self._skip_whitespace()
+                    if self._cur_type is TT.lbreak:
+                        # whitespace at the end of a line, for instance
+                        # before a comment after '-', isn't indentation
+                        indent = 0
                     self._skip_newlines()
-            elif self._cur_token['type'] is TT.id:
+            elif self._cur_type is TT.id:
                 array.append(self._parse_key(indent))
-            elif self._cur_token['type'] is TT.hyphen:
+            elif self._cur_type is TT.hyphen:
                 self._increment()
-                if self._cur_token['type'] is not TT.hyphen or self._finished:
+                if self._cur_type is not TT.hyphen or self._finished:
                     return array
                 else:
                     self._increment()
@@ -195,68 +292,59 @@ class Parser:
 
     def _parse_literal_list(self, indent):
         """Parse a list of literals."""
-        if self._cur_token['type'] not in self._literals:
+        if self._cur_type not in self._literals:
             raise Exception(
                 "Parser failed, _parse_literal_list was called on non-literal"
                 " {} on line {}.".format(
-                    repr(self._cur_token['value']), self._cur_token['line']
+                    repr(self._cur_value), self._cur_token.line
                 )
             )
 
         # find next token after whitespace without incrementing
-        temp_position = self._cur_position
-        while (
-            temp_position < self.num_tokens-1 and (
-                self.tokens[temp_position]['type'] is TT.ws or
-                self.tokens[temp_position]['type'] in self._literals
-            )
-        ):
-            temp_position += 1
-        next_token = self.tokens[temp_position]
+        temp_position = self._skip_literals(self._cur_position)
+        next_type = self._type_at(temp_position)
 
-        # end of stream
-        if next_token['type'] is TT.ws:
-            return self._cur_token['value']
-        elif next_token['type'] is TT.comma:
+        # end of stream, which may be whitespace left before a comment
+        if next_type is TT.ws:
+            rval = self._cur_value
+            self._increment()
+            return rval
+        elif next_type is TT.comma:
             return self._parse_comma_list()
-        elif next_token['type'] is TT.lbreak:
-            while (
-                temp_position < self.num_tokens-1 and
-                self.tokens[temp_position]['type'] in (TT.lbreak, TT.ws)
-            ):
-                temp_position += 1
-            if self.tokens[temp_position]['type'] in self._literals:
+        elif next_type is TT.lbreak:
+            temp_position = self._skip_blank(temp_position)
+            if self._type_at(temp_position) in self._literals:
                 return self._parse_newline_list(indent)
             else:
-                rval = self._cur_token['value']
+                rval = self._cur_value
                 self._increment()
                 return rval
         else:
-            rval = self._cur_token['value']
+            rval = self._cur_value
             self._increment()
             return rval
 
     def _parse_comma_list(self):
         """Parse a comma seperated list."""
-        if self._cur_token['type'] not in self._literals:
+        if self._cur_type not in self._literals:
             raise Exception(
                 "Parser failed, _parse_comma_list was called on non-literal"
                 " {} on line {}.".format(
-                    repr(self._cur_token['value']), self._cur_token['line']
+                    repr(self._cur_value), self._cur_token.line
                 )
             )
 
         array = []
-        while self._cur_token['type'] in self._literals and not self._finished:
-            array.append(self._cur_token['value'])
+        while self._cur_type in self._literals and not self._finished:
+            array.append(self._cur_value)
             self._increment()
             self._skip_whitespace()
-            if self._cur_token['type'] is TT.comma:
+            if self._cur_type is TT.comma:
                 self._increment()
                 self._skip_whitespace()
             elif (
                 not self._finished and
-                self._cur_token['type'] not in (TT.ws, TT.lbreak)
+                self._cur_type not in (TT.ws, TT.lbreak)
             ):
                 raise ParseError('comma or newline', self._cur_token)
 
@@ -264,11 +352,11 @@ class Parser:
 
     def _parse_newline_list(self, indent):
         """Parse a newline seperated list."""
-        if self._cur_token['type'] not in self._literals:
+        if self._cur_type not in self._literals:
             raise Exception(
                 "Parser failed, _parse_newline_list was called on non-literal"
                 " {} on line {}.".format(
-                    repr(self._cur_token['value']), self._cur_token['line']
+                    repr(self._cur_value), self._cur_token.line
                 )
             )
 
@@ -278,32 +366,23 @@ class Parser:
             if new_indent < indent:
                 break
             elif new_indent == indent:
-                while self._cur_token['type'] is TT.lbreak:
+                while self._cur_type is TT.lbreak:
                     self._skip_newlines()
                     self._skip_whitespace()
                 # look ahead to see if it's a comma seperated list
-                temp_position = self._cur_position
-                while (
-                    temp_position < self.num_tokens-1 and
-                    (
-                        self.tokens[temp_position]['type'] is TT.ws or
-                        self.tokens[temp_position]['type'] in self._literals
-                    )
-                ):
-                    temp_position += 1
-
-                if self.tokens[temp_position]['type'] is TT.comma:
+                temp_position = self._skip_literals(self._cur_position)
+                if self._type_at(temp_position) is TT.comma:
                     array.append(self._parse_comma_list())
                 else:
-                    if self._cur_token['type'] is not TT.hyphen:
-                        array.append(self._cur_token['value'])
-                    elif self._nth_token()['type'] is TT.hyphen:
+                    if self._cur_type is not TT.hyphen:
+                        array.append(self._cur_value)
+                    elif self._nth_type() is TT.hyphen:
                         # two consecutive '-'s
                         array.append([])
                         self._increment()
                     self._increment()
             else:  # new_indent > indent
-                while self._cur_token['type'] is TT.lbreak:
+                while self._cur_type is TT.lbreak:
                     self._skip_newlines()
                     self._skip_whitespace()
                 array.append(self._parse_newline_list(new_indent))
@@ -311,20 +390,124 @@ class Parser:
             self._skip_whitespace()
             if (
                 not self._finished and
-                self._cur_token['type'] not in (TT.lbreak, TT.hyphen)
+                self._cur_type not in (TT.lbreak, TT.hyphen)
             ):
                 raise ParseError('newline', self._cur_token)
 
-            temp_position = self._cur_position
-            new_indent = 0
-            while (
-                temp_position < self.num_tokens-1 and
-                self.tokens[temp_position]['type'] in (TT.lbreak, TT.ws)
-            ):
-                if self.tokens[temp_position]['type'] is TT.lbreak:
-                    new_indent = 0
-                else:
-                    new_indent += 1
-                temp_position += 1
+            new_indent = self._next_indent(self._cur_position)
 
         return array
+
+
+class StreamParser(Parser):
+
+    """Parses tokens as they are pulled from an iterator.
+
+    Rather than keeping every token of the document only a window starting
+    just before the current token is kept, it grows as far as the parser
+    needs to look ahead (at most a line or a run of blank lines) and is
+    trimmed as the parser moves forward.
+    """
+
+    def __init__(self, tokens):
+        """Initialize the token window, excluding comments."""
+        self._tokens = (t for t in tokens if t.type is not TT.comment)
+        self._window = collections.deque()
+        # absolute position of the first token in the window
+        self._window_start = 0
+        self._cur_position = 0
+        self._finished = False
+        self._parsed = False
+        self._data = None
+        self._literals = (TT.str, TT.int, TT.float, TT.bool, TT.null)
+
+    @property
+    def data(self):
+        """Return parsed data structure, the tokens can only be parsed once."""
+        if not self._parsed:
+            self._parse()
+            self._parsed = True
+
+        return self._data
+
+    def _has(self, position):
+        """Pull tokens into the window until it reaches position.
+
+        Returns whether there is a token at position.
+        """
+        window = self._window
+        while position >= self._window_start + len(window):
+            token = next(self._tokens, None)
+            if token is None:
+                return False
+            window.append(token)
+
+        return True
+
+    def _token_at(self, position):
+        """Return the token at an absolute position."""
+        self._has(position)
+        return self._window[position - self._window_start]
+
+    def _type_at(self, position):
+        """Return the type of the token at an absolute position."""
+        return self._token_at(position).type
+
+    def _value_at(self, position):
+        """Return the value of the token at an absolute position."""
+        return self._token_at(position).value
+
+    def _increment(self, n=1):
+        """Move forward n tokens, dropping all but one passed token."""
+        super()._increment(n)
+        window = self._window
+        while self._window_start < self._cur_position - 1 and window:
+            window.popleft()
+            self._window_start += 1
+
+    def _build_tables(self):
+        """Do nothing, the window never holds the whole document."""
+
+    def _count_ws(self, position):
+        """Return the number of whitespace tokens from position."""
+        count = 0
+        while self._has(position + 1) and self._type_at(position) is TT.ws:
+            position += 1
+            count += 1
+
+        return count
+
+    def _skip_literals(self, position):
+        """Return the position after any whitespace and literals."""
+        while self._has(position + 1) and (
+            self._type_at(position) is TT.ws or
+            self._type_at(position) in self._literals
+        ):
+            position += 1
+
+        return position
+
+    def _skip_blank(self, position):
+        """Return the position after any line breaks and whitespace."""
+        while (
+            self._has(position + 1) and
+            self._type_at(position) in (TT.lbreak, TT.ws)
+        ):
+            position += 1
+
+        return position
+
+    def _next_indent(self, position):
+        """Return the indent of the next line after position."""
+        indent = 0
+        while (
+            self._has(position + 1) and
+            self._type_at(position) in (TT.lbreak, TT.ws)
+        ):
+            if self._type_at(position) is TT.lbreak:
+                indent = 0
+            else:
+                indent += 1
+            position += 1
+
+        return indent
@@ -0,0 +1,220 @@
+"""Decodes and encodes Hip documents in parallel in a pool of processes."""
+import os
+import re
+import collections
+import concurrent.futures
+
+from . import compiler
+from .lexer import Lexer
+from .parser import Parser
+
+
+Result = collections.namedtuple('Result', 'path data error')
+Result.__doc__ = """The outcome of reading one file.
+
+data is the decoded file, or None if reading it raised error.
+"""
+
+
+def read_file(path):
+    """Read a single file, catching any error."""
+    # imported here so that the module can be imported by hippy itself
+    from . import read
+    try:
+        return Result(path, read(path), None)
+    except Exception as error:
+        return Result(path, None, error)
+
+
+def read_batch(paths):
+    """Read a batch of files in a worker process."""
+    return [read_file(path) for path in paths]
+
+
+def batches(paths, batch_bytes, batch_files):
+    """Split paths into batches of about batch_bytes but few files."""
+    batch = []
+    size = 0
+    for path in paths:
+        try:
+            size += os.stat(path).st_size
+        except OSError:
+            # the worker will report the error
+            pass
+        batch.append(path)
+        if size >= batch_bytes or len(batch) >= batch_files:
+            yield batch
+            batch = []
+            size = 0
+
+    if batch:
+        yield batch
+
+
+def read_many(
+    paths, workers=None, ordered=True, batch_bytes=256 * 1024,
+    batch_files=64,
+):
+    """Yield a Result for each of paths, reading them in worker processes.
+
+    Small files are sent to the workers in batches of up to batch_files
+    files or batch_bytes bytes to keep the cost of sending tasks down.
+    Results come in the order of paths if ordered is True and as soon as
+    their batch is done otherwise. A file which fails to read gives a
+    Result with the exception rather than stopping the others. workers
+    defaults to the number of CPUs, with a single worker the files are
+    read in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for path in paths:
+            yield read_file(path)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(read_batch, batch)
+            for batch in batches(paths, batch_bytes, batch_files)
+        ]
+        if not ordered:
+            futures = concurrent.futures.as_completed(futures)
+        for future in futures:
+            yield from future.result()
+
+
+# The line opening a top-level object list and the lines between records,
+# only bare ones as the pieces are parsed behind a bare '-'. Whitespace or a
+# comment after them leaves the document unsplit.
+_opener = re.compile(r'-\r?\n')
+_separator = re.compile(r'^--\r?$', re.M)
+
+# Appended to every piece to check that it ends with the parser back at the
+# top level, the second key only stays in the same record if the parser
+# would start the next piece's records at indent 0.
+_sentinel = '\n--\n_hippy_split_0: 0\n_hippy_split_1: 1\n-'
+_sentinel_record = {'_hippy_split_0': 0, '_hippy_split_1': 1}
+
+
+def split_object_list(content, parts):
+    """Split the records of a top-level object list into about parts pieces.
+
+    content must have had its tabs replaced and been stripped as Lexer
+    would. Each piece holds whole records separated by '--' lines at the
+    start of a line, None is returned if content isn't an object list
+    opened by a line holding just '-'.
+    """
+    if not _opener.match(content) or not content.endswith('\n-'):
+        return None
+
+    start = _opener.match(content).end()
+    end = len(content) - 2
+    step = max((end - start) // parts, 1)
+    pieces = []
+    pos = start
+    for i in range(1, parts):
+        match = _separator.search(content, max(pos, start + i * step), end)
+        if match is None:
+            break
+        # leave out the line break before the separator
+        pieces.append(content[pos:max(match.start() - 1, pos)])
+        pos = match.end() + 1
+    pieces.append(content[pos:end])
+
+    return pieces
+
+
+def decode_piece(piece):
+    """Decode the records of a piece followed by the sentinel record."""
+    return Parser(Lexer('-\n' + piece + _sentinel)).data
+
+
+def decode(string, workers=None):
+    """Decode a Hip string, parsing a top-level object list in parallel.
+
+    The records are split into pieces at '--' lines which are decoded in
+    worker processes. Each piece has to end with the parser back at the
+    top level, otherwise, or if anything goes wrong or the string isn't an
+    object list, the string is simply decoded in this process, so the
+    result is always that of Parser.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    pieces = None
+    if workers > 1:
+        content = string.replace('\t', ' ').strip()
+        pieces = split_object_list(content, workers * 4)
+    if pieces is None or len(pieces) < 2:
+        return Parser(Lexer(string)).data
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            parts = list(executor.map(decode_piece, pieces))
+    except Exception:
+        return Parser(Lexer(string)).data
+
+    data = []
+    for part in parts:
+        if type(part) is not list or not part or part[-1] != _sentinel_record:
+            return Parser(Lexer(string)).data
+        del part[-1]
+        data.extend(part)
+
+    return data
+
+
+def encode_records(records, default=None, encoders=None):
+    """Compile a slice of a top-level list of objects in a worker process.
+
+    Returns the object list without the line breaks the compiler puts
+    around it, so the results for consecutive slices can just be joined.
+    """
+    compiling = compiler.Compiler(records, default=default, encoders=encoders)
+    compiling.compile()
+    return compiling.buffer[1:-1]
+
+
+def encode_pieces(data, workers=None, default=None):
+    """Yield the compiled data in order, in pieces which are joined as is.
+
+    If data is a list of dictionaries slices of it are compiled in worker
+    processes, each record of an object list compiles the same wherever it
+    is in the list. Any other data, and the slices from the first which a
+    worker couldn't compile, for instance because it can't be pickled, are
+    compiled in this process. The output and any error raised are those of
+    the serial compiler.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if (
+        workers <= 1 or type(data) is not list or len(data) < 2 or
+        any(type(item) is not dict for item in data)
+    ):
+        yield compiler.Compiler(data, default=default).compile()
+        return
+
+    size = -(-len(data) // (workers * 4))
+    slices = [data[i:i + size] for i in range(0, len(data), size)]
+    # the worker may not have the encoders registered in this process
+    encoders = dict(compiler._encoders)
+    done = 0
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(encode_records, records, default, encoders)
+            for records in slices
+        ]
+        try:
+            for future in futures:
+                yield future.result()
+                done += 1
+        except Exception:
+            pass
+        finally:
+            for future in futures[done:]:
+                future.cancel()
+
+    for records in slices[done:]:
+        yield encode_records(records, default)
@@ -0,0 +1,107 @@
+"""Reads Hip files through a precompiled .hipc sidecar file.
+
+The sidecar holds the decoded data in marshal format behind a header
+recording the mtime, size and SHA-1 hash of the source it was made from.
+It is used as long as the source's mtime and size match or, failing that,
+its contents still hash the same, otherwise the source is parsed again and
+a new sidecar is written.
+"""
+import io
+import os
+import struct
+import hashlib
+import marshal
+import tempfile
+
+from .lexer import Lexer
+from .parser import Parser
+
+
+MAGIC = b'HIPC'
+VERSION = 1
+
+# magic, sidecar version, marshal version, mtime_ns, size, sha1
+_header = struct.Struct('<4sBBqQ20s')
+
+
+def sidecar_path(file_name):
+    """Return the path of the sidecar for a Hip file."""
+    if file_name.endswith('.hip'):
+        return file_name + 'c'
+    else:
+        return file_name + '.hipc'
+
+
+def load(path, expected):
+    """Return (header, data) of a sidecar or None if it can't be used.
+
+    expected is the magic, sidecar version and marshal version it needs,
+    other files behind the same header such as a .hipx index have their own.
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except OSError:
+        return None
+
+    if len(raw) < _header.size:
+        return None
+    header = _header.unpack_from(raw)
+    if header[:3] != expected:
+        return None
+    try:
+        return header, marshal.loads(raw[_header.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def dump(path, info, digest, data, magic=MAGIC, version=VERSION):
+    """Atomically write a sidecar, giving up quietly if it can't be."""
+    try:
+        payload = marshal.dumps(data)
+    except ValueError:
+        return
+
+    header = _header.pack(
+        magic, version, marshal.version, info.st_mtime_ns, info.st_size,
+        digest,
+    )
+    directory = os.path.dirname(path) or '.'
+    try:
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(temp, path)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def read(file_name):
+    """Read and decode a Hip file, using and refreshing its sidecar."""
+    path = sidecar_path(file_name)
+    info = os.stat(file_name)
+    loaded = load(path, (MAGIC, VERSION, marshal.version))
+    if loaded is not None:
+        (header, data) = loaded
+        if header[3:5] == (info.st_mtime_ns, info.st_size):
+            return data
+
+    with open(file_name, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).digest()
+    if loaded is not None and header[5] == digest:
+        # only touched, the sidecar just needs the new mtime
+        dump(path, info, digest, data)
+        return data
+
+    # decode just as open(file_name, 'r') would have
+    data = Parser(Lexer(io.TextIOWrapper(io.BytesIO(raw)).read())).data
+    dump(path, info, digest, data)
+    return data
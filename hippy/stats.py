@@ -0,0 +1,201 @@
+"""Contains Stats, recording where the time goes in decoding and encoding.
+
+Instrumented subclasses of Parser and Compiler are only used when a Stats
+object is passed in, so the normal code paths don't pay for any of it.
+"""
+import time
+import tracemalloc
+
+from .lexer import Lexer, TokenType
+from .parser import Parser
+from .compiler import Compiler
+
+
+class Stats:
+
+    """Timings and counts collected while decoding or encoding.
+
+    times maps each stage to the seconds spent in it: 'lex' and 'parse'
+    when decoding, of which 'values' is the part of parsing spent decoding
+    token values such as unescaping strings, and 'compile' when encoding.
+    tokens counts the tokens of each TokenType, lookaheads and
+    lookahead_steps count the parser's peeks ahead and the tokens they
+    looked past and max_depth is the deepest nesting of objects and lists.
+
+    If trace_memory is True tracemalloc traces the call and peak_memory and
+    memory are the peak and final bytes allocated. hook is called with the
+    name and seconds of each stage as it finishes.
+    """
+
+    def __init__(self, trace_memory=False, hook=None):
+        """Start with empty stats."""
+        self.trace_memory = trace_memory
+        self.hook = hook
+        self.times = {}
+        self.tokens = {}
+        self.lookaheads = 0
+        self.lookahead_steps = 0
+        self.max_depth = 0
+        self.peak_memory = None
+        self.memory = None
+
+    def __repr__(self):
+        """Show the times and counts."""
+        return (
+            'Stats(times={}, lookaheads={}, max_depth={}, peak_memory={})'
+            .format(
+                self.times, self.lookaheads, self.max_depth, self.peak_memory
+            )
+        )
+
+    def decode(self, string):
+        """Decode a Hip string, recording stats."""
+        return self._traced(self._decode, string)
+
+    def encode(self, data, default=None):
+        """Encode a data structure, recording stats."""
+        return self._traced(self._encode, data, default)
+
+    def _traced(self, func, *args):
+        """Call func, tracing memory if asked to."""
+        if not self.trace_memory:
+            return func(*args)
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            return func(*args)
+        finally:
+            (current, peak) = tracemalloc.get_traced_memory()
+            self.memory = current - before
+            self.peak_memory = peak - before
+            if started:
+                tracemalloc.stop()
+
+    def _stage(self, name, start):
+        """Record the time since start for a stage."""
+        seconds = time.perf_counter() - start
+        self.times[name] = self.times.get(name, 0) + seconds
+        if self.hook is not None:
+            self.hook(name, seconds)
+
+    def _decode(self, string):
+        """Decode a string with the instrumented parser."""
+        start = time.perf_counter()
+        tokens = Lexer(string).tokenize(comments=False)
+        self._stage('lex', start)
+
+        types = tokens.types.tobytes()
+        for typ in TokenType:
+            count = types.count(bytes([typ.value]))
+            if count:
+                self.tokens[typ] = self.tokens.get(typ, 0) + count
+
+        start = time.perf_counter()
+        parser = _Parser(tokens)
+        parser.stats = self
+        self.times.setdefault('values', 0)
+        try:
+            return parser.data
+        finally:
+            self._stage('parse', start)
+
+    def _encode(self, data, default):
+        """Encode data with the instrumented compiler."""
+        start = time.perf_counter()
+        compiler = _Compiler(data, default=default)
+        compiler.stats = self
+        try:
+            return compiler.compile()
+        finally:
+            self._stage('compile', start)
+
+
+class _Parser(Parser):
+
+    """Parser which reports its lookahead, nesting and value decoding."""
+
+    stats = None
+    _depth = 0
+
+    def _nest(self, method, *args):
+        """Call a method parsing an object or list, tracking the depth."""
+        self._depth += 1
+        if self._depth > self.stats.max_depth:
+            self.stats.max_depth = self._depth
+        try:
+            return method(*args)
+        finally:
+            self._depth -= 1
+
+    def _parse_key(self, indent):
+        """Parse an object one level deeper."""
+        return self._nest(super()._parse_key, indent)
+
+    def _parse_object_list(self):
+        """Parse an object list one level deeper."""
+        return self._nest(super()._parse_object_list)
+
+    def _parse_comma_list(self):
+        """Parse a comma list one level deeper."""
+        return self._nest(super()._parse_comma_list)
+
+    def _parse_newline_list(self, indent):
+        """Parse a newline list one level deeper."""
+        return self._nest(super()._parse_newline_list, indent)
+
+    def _count_ws(self, position):
+        """Count the peek and the tokens it looked past."""
+        count = super()._count_ws(position)
+        self.stats.lookaheads += 1
+        self.stats.lookahead_steps += count
+        return count
+
+    def _skip_literals(self, position):
+        """Count the peek and the tokens it looked past."""
+        end = super()._skip_literals(position)
+        self.stats.lookaheads += 1
+        self.stats.lookahead_steps += end - position
+        return end
+
+    def _skip_blank(self, position):
+        """Count the peek and the tokens it looked past."""
+        end = super()._skip_blank(position)
+        self.stats.lookaheads += 1
+        self.stats.lookahead_steps += end - position
+        return end
+
+    def _value_at(self, position):
+        """Time the decoding of a token's value."""
+        start = time.perf_counter()
+        value = super()._value_at(position)
+        self.stats.times['values'] += time.perf_counter() - start
+        return value
+
+
+class _Compiler(Compiler):
+
+    """Compiler which reports the nesting depth it reaches."""
+
+    stats = None
+    _depth = 0
+
+    def _compile_container(self, data, layout, indent_level):
+        """Track the depth for as long as the container is compiled."""
+        return self._nest(
+            super()._compile_container(data, layout, indent_level)
+        )
+
+    def _nest(self, compiling):
+        """Pass on what a container's generator yields one level deeper."""
+        self._depth += 1
+        if self._depth > self.stats.max_depth:
+            self.stats.max_depth = self._depth
+        try:
+            yield from compiling
+        finally:
+            self._depth -= 1
@@ -0,0 +1,64 @@
+from nose.tools import *
+import os
+import asyncio
+import tempfile
+import concurrent.futures
+import hippy
+from hippy.parser import ParseError
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+async def collect(chunks, chunk_size=7):
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    return [record async for record in hippy.aiter_decode(reader, chunk_size)]
+
+def test_aread_awrite():
+    data = [{'id': 1, 'tags': ['a', 'b']}, {'id': 2, 'tags': []}]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.hip')
+        run(hippy.awrite(path, data))
+        eq_(hippy.read(path), data)
+        eq_(run(hippy.aread(path)), data)
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            eq_(run(hippy.aread(path, executor, stream=True)), data)
+
+def test_aiter_decode():
+    data = [
+        {'id': i, 'name': 'café {}'.format(i), 'deep': {'x': [i, i + 1], 'y': [{'z': i}]}}
+        for i in range(20)
+    ]
+    doc = hippy.encode(data).encode('utf-8')
+    for size in (1, 7, 4096):
+        eq_(run(collect([doc], size)), data)
+    eq_(run(collect([doc[i:i + 3] for i in range(0, len(doc), 3)])), data)
+
+def test_aiter_decode_like_iter_decode():
+    docs = [
+        '  \n-\n    a: 1\n  --\n    b: 2\n-\nignored: 1',
+        '1\n2\n3',
+        '1, 2, 3',
+        '-\na:\n    -\n    b: 1\n    -\n-',
+    ]
+    for doc in docs:
+        eq_(run(collect([doc.encode('utf-8')])), list(hippy.iter_decode(doc)))
+
+@raises(ParseError)
+def test_aiter_decode_not_list():
+    run(collect([b'a: 1']))
+
+def test_aiter_decode_error_line():
+    try:
+        run(collect([b'-\na: 1\n--\nb: 2\n--\n\nc: [\n-'], 4))
+    except hippy.lexer.LexError as e:
+        eq_(e.line, 6)
+    else:
+        assert False
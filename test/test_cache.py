@@ -0,0 +1,98 @@
+from nose.tools import *
+import os
+import tempfile
+import threading
+import hippy
+from hippy.cache import *
+
+
+def write(tmp, name, data):
+    path = os.path.join(tmp, name)
+    hippy.write(path, data)
+    return path
+
+def test_hit():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache()
+        path = write(tmp, 'a.hip', {'a': [1, 2]})
+        eq_(cache.read(path), {'a': [1, 2]})
+        eq_(cache.read(path), {'a': [1, 2]})
+        eq_((cache.hits, cache.misses), (1, 1))
+
+def test_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache()
+        path = write(tmp, 'a.hip', {'a': [1, 2]})
+        cache.read(path)['a'].append(3)
+        eq_(cache.read(path), {'a': [1, 2]})
+
+def test_changed():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache()
+        path = write(tmp, 'a.hip', {'a': 1})
+        cache.read(path)
+        hippy.write(path, {'a': 12})
+        eq_(cache.read(path), {'a': 12})
+        eq_(cache.misses, 2)
+
+def test_lru():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache(max_entries=2)
+        paths = [write(tmp, '{}.hip'.format(i), i) for i in range(3)]
+        cache.read(paths[0])
+        cache.read(paths[1])
+        cache.read(paths[0])
+        cache.read(paths[2])
+        eq_(len(cache), 2)
+        cache.read(paths[0])
+        eq_(cache.hits, 2)
+        cache.read(paths[1])
+        eq_(cache.misses, 4)
+
+def test_max_bytes():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache(max_bytes=30)
+        small = write(tmp, 'small.hip', 1)
+        big = write(tmp, 'big.hip', 'x' * 40)
+        cache.read(small)
+        eq_(cache.read(big), 'x' * 40)
+        eq_(len(cache), 0)
+
+def test_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HipCache()
+        path = write(tmp, 'a.hip', {'a': list(range(100))})
+        results = []
+        def read():
+            for _ in range(20):
+                results.append(cache.read(path))
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        eq_(len(results), 80)
+        assert all(r == {'a': list(range(100))} for r in results)
+        eq_(cache.hits + cache.misses, 80)
+
+def test_read():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, 'a.hip', {'a': 1})
+        cache = HipCache()
+        eq_(hippy.read(path, cache=cache), {'a': 1})
+        eq_(hippy.read(path, cache=cache), {'a': 1})
+        eq_(cache.hits, 1)
+        eq_(hippy.read(path, cache=True), {'a': 1})
+
+def test_read_conflicts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, 'a.hip', {'a': 1})
+        options = [
+            {'stream': True}, {'cache': HipCache()}, {'sidecar': True},
+            {'mmap': True}, {'workers': 2},
+        ]
+        for (i, first) in enumerate(options):
+            eq_(hippy.read(path, **first), {'a': 1})
+            for second in options[i + 1:]:
+                assert_raises(ValueError, hippy.read, path, **dict(first, **second))
+        eq_(hippy.read(path, cache=None, workers=None), {'a': 1})
@@ -35,3 +35,132 @@ a: 1
 b: 2
 -'''
     eq_(hipile(a), b)
+
+def test_dump():
+    import io
+    datas = [
+        1,
+        [1, 'two', None],
+        [{'a':1},{'b':2}],
+        {'a': {'b': [1, [2, 3], 4]}, 'c': [{'d': yes} for yes in (True, False)]},
+    ]
+    for data in datas:
+        for size in (1, 5, 65536):
+            f = io.StringIO()
+            Compiler(data).dump(f, size)
+            eq_(f.getvalue(), hipile(data))
+
+def test_dump_blocks():
+    class Writes(list):
+        write = list.append
+    data = {'k{}'.format(i): i for i in range(1000)}
+    f = Writes()
+    Compiler(data).dump(f, 100)
+    assert len(f) > 10
+    assert all(len(block) < 120 for block in f)
+    eq_(''.join(f), hipile(data))
+
+def test_item_after_objects():
+    eq_(hipile([{'a':1}, 5, 6]), '-\na: 1\n-\n\n5\n6')
+
+def test_deep():
+    data = 1
+    for i in range(5000):
+        data = {'a': data}
+    out = hipile(data)
+    eq_(out.count('a:'), 5000)
+    assert out.endswith(' ' * 4 * 4999 + 'a: 1')
+
+def test_subclasses():
+    import enum
+    class Str(str):
+        pass
+    class Int(int):
+        pass
+    class Colour(enum.Enum):
+        red = 'red'
+        green = 2
+    class Level(enum.IntEnum):
+        high = 3
+    eq_(hipile([Str('a'), Int(3), Colour.red, Colour.green, Level.high]),
+        "'a', 3, 'red', 2, 3")
+
+def test_std_types():
+    import decimal, datetime
+    eq_(hipile(decimal.Decimal('1.50')), '1.50')
+    eq_(hipile(datetime.date(2016, 2, 29)), "'2016-02-29'")
+    eq_(hipile({'at': datetime.datetime(2016, 2, 29, 12, 30)}),
+        "at: '2016-02-29T12:30:00'")
+
+def test_decimal_not_finite():
+    import decimal
+    for value in ('NaN', 'sNaN', 'Infinity', '-Infinity'):
+        assert_raises(ValueError, hipile, {'a': decimal.Decimal(value)})
+
+@raises(TypeError)
+def test_unknown_type():
+    hipile({'a': object()})
+
+def test_default():
+    class Point:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+    def default(value):
+        return {'x': value.x, 'y': value.y}
+    eq_(Compiler([Point(1, 2), Point(3, 4)], default=default).compile(),
+        '-\nx: 1\ny: 2\n--\nx: 3\ny: 4\n-')
+    eq_(Compiler({'a': object()}, default=lambda v: 'obj').compile(), "a: 'obj'")
+
+@raises(ValueError)
+def test_default_circular():
+    class X:
+        pass
+    Compiler({'a': X()}, default=lambda v: v).compile()
+
+@raises(ValueError)
+def test_default_cycle():
+    class X:
+        pass
+    class Y:
+        pass
+    Compiler([1, X()], default=lambda v: Y() if type(v) is X else X()).compile()
+
+def test_encoders():
+    class Money:
+        def __init__(self, cents):
+            self.cents = cents
+    encoders = {Money: lambda m: '{}.{:02}'.format(m.cents // 100, m.cents % 100)}
+    eq_(Compiler({'price': Money(1250)}, encoders=encoders).compile(), 'price: 12.50')
+    eq_(Compiler({'price': True}, encoders={bool: lambda b: 'nil'}).compile(), 'price: nil')
+
+def test_iterables():
+    import types
+    data = {'a': [1, [2, 3], {'b': 4}], 'c': [], 'd': [{'e': 5}]}
+    lazy = {
+        'a': (x for x in (1, (2, 3), types.MappingProxyType({'b': 4}))),
+        'c': iter(()),
+        'd': ({'e': 5},),
+    }
+    eq_(hipile(lazy), hipile(data))
+    eq_(hipile(range(3)), hipile([0, 1, 2]))
+    eq_(hipile({'a': 1}.values()), hipile([1]))
+
+@raises(TypeError)
+def test_bytes():
+    hipile({'a': b'bytes'})
+
+def test_iterable_streamed():
+    import io
+    produced = []
+    def rows():
+        for i in range(1000):
+            produced.append(i)
+            yield {'id': i, 'tags': ('a', i)}
+    class Writes(list):
+        def write(self, block):
+            self.append(len(produced))
+    f = Writes()
+    Compiler(rows()).dump(f, 100)
+    # output is written while the rows are still being produced
+    assert f[0] < 10
+    assert len(f) > 100
@@ -0,0 +1,260 @@
+from nose.tools import *
+import hippy
+from hippy.events import *
+from hippy.parser import ParseError
+
+
+def build_values(pairs):
+    stack = [[]]
+    keys = []
+    for (event, value) in pairs:
+        if event == 'key':
+            keys.append(value)
+            continue
+        elif event == 'start_object':
+            stack.append({})
+            continue
+        elif event == 'start_list':
+            stack.append([])
+            continue
+        elif event in ('end_object', 'end_list'):
+            value = stack.pop()
+
+        if isinstance(stack[-1], dict):
+            stack[-1][keys.pop()] = value
+        else:
+            stack[-1].append(value)
+
+    return stack[0][0]
+
+def test_literal():
+    eq_(list(iterparse('1')), [('value', 1)])
+    eq_(list(iterparse('"a"')), [('value', 'a')])
+
+def test_key_val():
+    eq_(list(iterparse('a: 1\nb: yes, nil\nc: --')), [
+        ('start_object', None),
+        ('key', 'a'), ('value', 1),
+        ('key', 'b'), ('start_list', None),
+        ('value', True), ('value', None),
+        ('end_list', None),
+        ('key', 'c'), ('start_list', None), ('end_list', None),
+        ('end_object', None),
+    ])
+
+def test_object_list():
+    eq_(list(iterparse('-\na: 1\n--\nb: 2\n-')), [
+        ('start_list', None),
+        ('start_object', None), ('key', 'a'), ('value', 1),
+        ('end_object', None),
+        ('start_object', None), ('key', 'b'), ('value', 2),
+        ('end_object', None),
+        ('end_list', None),
+    ])
+
+def test_newline_lists():
+    eq_(list(iterparse('1\n2\n    3, 4\n5')), [
+        ('start_list', None),
+        ('value', 1), ('value', 2),
+        ('start_list', None),
+        ('start_list', None), ('value', 3), ('value', 4), ('end_list', None),
+        ('end_list', None),
+        ('value', 5),
+        ('end_list', None),
+    ])
+
+def test_same_as_decode():
+    docs = [
+        '# comment\na: 1\nb:\n    c: "x"\n    d:\n        1\n        2\ne: 3',
+        'bands:\n    -\n    name: "a"\n    members:\n        -\n'
+        '        name: "b"\n        --\n        name: "c"\n        -\n'
+        '    --\n    name: "d"\n    -\nx: 1',
+        hippy.encode({'a': [1, [2, 2, [3, 3], 2], 1]}),
+        hippy.encode([{'a': [{'b': 1}], 'c': [1, 2]}, {'d': 4}]),
+    ]
+    for doc in docs:
+        eq_(build_values(iterparse(doc)), hippy.decode(doc))
+
+def test_chunks():
+    doc = hippy.encode([{'a': i, 'b': 'x' * i} for i in range(50)])
+    chunks = (doc[i:i+7] for i in range(0, len(doc), 7))
+    eq_(build_values(hippy.iterparse(chunks)), hippy.decode(doc))
+
+def test_lazy():
+    read = []
+    def chunks():
+        for i in range(1000):
+            read.append(i)
+            yield 'k{}: {}\n'.format(i, i)
+    events = hippy.iterparse(chunks())
+    eq_(next(events), ('start_object', None))
+    eq_(next(events), ('key', 'k0'))
+    assert len(read) < 10
+
+@raises(ParseError)
+def test_missing_colon():
+    list(iterparse('a: 1\nb 2'))
+
+def test_build():
+    doc = 'a:\n    b: 1, 2\n    c:\n        -\n        d: nil\n        -\ne: "f"'
+    eq_(build(events(doc)), hippy.decode(doc))
+
+def test_build_deep():
+    doc = '\n'.join(' ' * i + 'a:' for i in range(500)) + ' 1'
+    data = build(events(doc))
+    for i in range(500):
+        data = data['a']
+    eq_(data, 1)
+
+def test_stack_engine():
+    docs = [
+        'a: 1',
+        'a: -1',
+        '# a comment\na: 1\nb: -1.23e-9\nc: yes\nd: no\ne: nil\n'
+        'f: "a \'string\'"\ng: \'a different "string"\'\n',
+        'a:\n   -\n   b: 1\n   c: 2\n   --\n   b: 1.1\n   c: 2.2\n'
+        '   --\n   b: \'one\'\n   c: \'two\'\n   -\nd: 3\n',
+        'a:\n    b:\n        c: 1\n        d:2\n    e:\n        f:3\n'
+        '        g: 4',
+        '1', '-4.76E-9', 'yes', 'no', 'nil', r'''"'a' \"string\""''',
+        '1, yes, no, 8, "5435", nil, 766',
+        'a: 1.1, 2.2, 3.3',
+        '1\n2\n3',
+        'a:\n"one"\n2\n3.3',
+        '1\n2\n3\n    4\n    5\n6',
+        'a:\n    1\n    2\n        3\n        4\n    5',
+        'a:\n    1\n    2, 3, 4\n    5',
+        '-\n   a: 2\n   b:2\n   --\n   c:1\n   t:7\n   -',
+        'a: 1,',
+        'bands:\n\t# a comment\n\t-\n\tname: "a"\n\tgenre: "b", "c"\n'
+        '\tmembers:\n\t\t-\n\t\tname: "d"\n\t\trole:\n\t\t\t"e"\n'
+        '\t\t\t"f"\n\t\t--\n\t\tname: "g"\n\t\t-\n\t--\n\tname: "h"\n\t-',
+    ]
+    for doc in docs:
+        eq_(hippy.decode(doc, engine='stack'), hippy.decode(doc))
+
+def test_stack_engine_empty_list_item():
+    # the compiler ends a record on the '--' of an empty list item
+    data = [{'a': [1, 2, []]}, {'b': 2}, {'c': 3}]
+    doc = hippy.encode(data)
+    eq_(doc, '-\na:\n    1\n    2\n    ----\nb: 2\n--\nc: 3\n-')
+    eq_(hippy.decode(doc, engine='stack'), data)
+
+    doc = '-\na:\n    1\n    ----\nb:\n    2\n    ------\nc: 3\n-'
+    eq_(hippy.decode(doc, engine='stack'), hippy.decode(doc))
+
+def test_stack_engine_deep():
+    doc = '\n'.join(' ' * i + 'a:' for i in range(1000)) + ' 1'
+    data = hippy.decode(doc, engine='stack')
+    for i in range(1000):
+        data = data['a']
+    eq_(data, 1)
+
+@raises(ValueError)
+def test_unknown_engine():
+    hippy.decode('a: 1', engine='fast')
+
+def test_iter_decode():
+    import io
+    records = [{'id': i, 'name': 'n{}'.format(i), 'tags': [i, 'x']} for i in range(20)]
+    doc = hippy.encode(records)
+    eq_(list(hippy.iter_decode(doc)), records)
+    eq_(list(hippy.iter_decode(io.StringIO(doc))), records)
+
+def test_iter_decode_separators():
+    # whitespace or a comment after '-' or '--' isn't indentation
+    docs = [
+        '-   \nc: 1\nb: 2\n-',
+        '- # records\nid: 1\nname: "a"\n--  \nid: 2\nname: "b"\n-',
+        '-\nid: 1\nname: "a"\n-- # x\nid: 2\nname: "b"\n-',
+    ]
+    for doc in docs:
+        eq_(list(hippy.iter_decode(doc)), hippy.decode(doc))
+        eq_(len(hippy.decode(doc)), 1 if doc.startswith('-   ') else 2)
+
+def test_iter_decode_empty_list_item():
+    data = [{'a': [1, 2, []]}, {'b': 2}, {'c': 3}]
+    eq_(list(hippy.iter_decode(hippy.encode(data))), data)
+
+def test_iter_decode_lazy():
+    read = []
+    def chunks():
+        yield '-\n'
+        for i in range(1000):
+            read.append(i)
+            yield 'id: {}\n--\n'.format(i)
+        yield 'id: 1000\n-'
+    records = hippy.iter_decode(chunks())
+    eq_(next(records), {'id': 0})
+    eq_(next(records), {'id': 1})
+    assert len(read) < 10
+
+@raises(ParseError)
+def test_iter_decode_not_list():
+    list(hippy.iter_decode('a: 1'))
+
+def test_get():
+    import io
+    data = {
+        'name': 'x',
+        'bands': [{'name': 'a', 'tags': ['t', 'u']}, {'name': 'b', 'm': {'k': [1, 2]}}],
+        'values': [1, 2, 3],
+    }
+    doc = hippy.encode(data)
+    eq_(hippy.get(doc, 'name'), 'x')
+    eq_(hippy.get(doc, 'bands.0.name'), 'a')
+    eq_(hippy.get(doc, 'bands.0.tags'), ['t', 'u'])
+    eq_(hippy.get(doc, 'bands.1'), data['bands'][1])
+    eq_(hippy.get(doc, 'bands.1.m.k.1'), 2)
+    eq_(hippy.get(doc, 'values.2'), 3)
+    eq_(hippy.get(doc, ('bands', 1, 'name')), 'b')
+    eq_(hippy.get(doc, 'bands.2.name'), None)
+    eq_(hippy.get(doc, 'name.x', 'missing'), 'missing')
+    eq_(hippy.get(doc, 'values.x', 'missing'), 'missing')
+    eq_(hippy.get(io.StringIO(doc), 'bands.1.name'), 'b')
+
+def test_get_many():
+    doc = hippy.encode([{'id': i, 'tags': [i, 'x']} for i in range(5)])
+    eq_(
+        hippy.get_many(doc, ['3.id', '0.tags.1', '9.id', ('1', 'id')]),
+        {'3.id': 3, '0.tags.1': 'x', '9.id': None, ('1', 'id'): 1},
+    )
+
+def test_get_many_nested():
+    # paths inside another wanted path come from its built value
+    doc = 'a:\n    b: 1\n    c: 2, 3\nd: 4'
+    eq_(
+        hippy.get_many(doc, ['a', 'a.b', 'a.c.1', 'a.c.01', 'a.x', 'd']),
+        {
+            'a': {'b': 1, 'c': [2, 3]}, 'a.b': 1, 'a.c.1': 3,
+            'a.c.01': None, 'a.x': None, 'd': 4,
+        },
+    )
+
+def test_get_many_repeated_key():
+    # the first value of a repeated key, whichever path is found last
+    doc = 'a: 1\na: 2\nb: 3'
+    eq_(hippy.get(doc, 'a'), 1)
+    eq_(hippy.get_many(doc, ['a', 'b']), {'a': 1, 'b': 3})
+    doc = 'a:\n    b: 1\na:\n    c: 2\nd: 3'
+    eq_(hippy.get_many(doc, ['a.b', 'a.c', 'd']), {'a.b': 1, 'a.c': None, 'd': 3})
+
+def test_get_many_empty_list_item():
+    doc = hippy.encode([{'a': [1, 2, []]}, {'b': 2}, {'c': 3}])
+    eq_(hippy.get_many(doc, ['0.a.2', '1.b', '2']), {'0.a.2': [], '1.b': 2, '2': {'c': 3}})
+
+def test_get_stops():
+    read = []
+    def chunks():
+        yield 'first: 1\nsecond:\n    a: 2\n'
+        read.append(1)
+        yield 'third: 3\n'
+        read.append(2)
+        yield 'fourth: [\n'
+    eq_(hippy.get(chunks(), 'second.a'), 2)
+    eq_(read, [1])
+
+def test_get_skips_values():
+    # values off the path are never decoded
+    doc = 'bad: "\\x"\nother:\n    x: "\\x"\ngood: 1'
+    eq_(hippy.get(doc, 'good'), 1)
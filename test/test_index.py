@@ -0,0 +1,124 @@
+from nose.tools import *
+import os
+import tempfile
+import hippy
+from hippy.index import *
+from hippy.parser import ParseError
+
+
+records = [
+    {'id': i, 'name': 'café {}'.format(i), 'flag': i % 3 == 0, 'tags': [i, 'x']}
+    for i in range(30)
+]
+records[7]['id'] = 1.0
+
+def write(tmp, data):
+    path = os.path.join(tmp, 'a.hip')
+    hippy.write(path, data)
+    return path
+
+def test_path():
+    eq_(index_path('a/b.hip'), 'a/b.hipx')
+    eq_(index_path('a/b.conf'), 'a/b.conf.hipx')
+
+def test_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, records)
+        eq_(build_index(path, keys=['id', 'flag']), None)
+        with open_indexed(path) as f:
+            eq_(len(f), 30)
+            eq_(f[12], records[12])
+            eq_(f[-1], records[-1])
+            eq_(list(f), records)
+            eq_(f.find('id', 5), [records[5]])
+            eq_(f.find('id', 1), [records[1]])
+            eq_(f.find('id', 1.0), [records[7]])
+            eq_(f.find('id', 99), [])
+            eq_(len(f.find('flag', True)), 10)
+        assert os.path.exists(index_path(path))
+
+@raises(KeyError)
+def test_not_indexed():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, records)
+        build_index(path)
+        with open_indexed(path) as f:
+            f.find('id', 1)
+
+def test_object():
+    data = {'a': 1, 'b': {'c': [1, 2]}, 'd': records[:3]}
+    with tempfile.TemporaryDirectory() as tmp:
+        with open_indexed(write(tmp, data)) as f:
+            eq_(len(f), 3)
+            eq_(list(f), ['a', 'b', 'd'])
+            eq_(f['d'], records[:3])
+            assert 'b' in f
+            eq_(f['b'], data['b'])
+
+def test_invalidated():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, records)
+        build_index(path, keys=['id'])
+        with open_indexed(path) as f:
+            eq_(f.find('id', 3), [records[3]])
+
+        # only touched, the index is kept
+        info = os.stat(path)
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        with open_indexed(path) as f:
+            eq_(f[3], records[3])
+
+        hippy.write(path, records[10:])
+        with open_indexed(path) as f:
+            eq_(len(f), 20)
+            eq_(f.find('id', 15), [records[15]])
+        with open_indexed(path, keys=['name']) as f:
+            eq_(f.find('name', 'café 12'), [records[12]])
+
+def test_error_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.hip')
+        with open(path, 'w') as f:
+            f.write('\n-\na: 1\n--\nb:\n    c 3\n-')
+        with open_indexed(path) as f:
+            eq_(f[0], {'a': 1})
+            try:
+                f[1]
+            except ParseError as e:
+                eq_(e.line, 4)
+            else:
+                assert False
+
+def test_same_as_read():
+    docs = [
+        '\n-\nid: 1 # c\n--\n\n# c\nid: 2\ntags:\n    - # c\n    a: 1\n    -\n-\n',
+        'a: 1 # c\nb:\n  # c\n    c: 2\n',
+        # records aren't all told apart by bare '-' and '--' lines
+        '- # people\nid: 1\nname: "a"\n-- # next\nid: 2\nname: "b"\n-',
+        hippy.encode([{'a': [1, 2, []]}, {'b': 2}, {'c': 3}]),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'a.hip')
+        for doc in docs:
+            with open(path, 'w') as f:
+                f.write(doc)
+            with open_indexed(path) as f:
+                if f.is_list:
+                    eq_(list(f), hippy.read(path))
+                else:
+                    eq_({key: f[key] for key in f}, hippy.read(path))
+
+def test_empty_list_item():
+    data = [{'a': [1, 2, []]}, {'b': 2}, {'c': 3}]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, data)
+        build_index(path, keys=['b'])
+        with open_indexed(path) as f:
+            eq_(len(f), 3)
+            eq_(list(f), hippy.read(path))
+            eq_(f.find('b', 2), [{'b': 2}])
+
+@raises(ValueError)
+def test_not_indexable():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_index(write(tmp, [1, 2, 3]))
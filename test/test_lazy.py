@@ -0,0 +1,105 @@
+from nose.tools import *
+import hippy
+from hippy.lazy import *
+from hippy.parser import ParseError
+
+
+config = {
+    'name': 'x',
+    'server': {'host': 'localhost', 'ports': [80, 443]},
+    'bands': [{'name': 'a', 'tags': ['t', 'u']}, {'name': 'b', 'tags': []}],
+    'values': [1, 2, 3],
+    'empty': [],
+}
+
+def test_mapping():
+    doc = hippy.encode(config)
+    data = hippy.decode(doc, lazy=True)
+    assert isinstance(data, LazyMapping)
+    eq_(list(data), list(config))
+    eq_(len(data), 5)
+    eq_(data['bands'][1]['name'], 'b')
+    assert data['server'] is data['server']
+    eq_(data, config)
+    assert 'name' in data
+    assert 'missing' not in data
+
+def test_sequence():
+    records = [{'id': i, 'tags': [i, 'x'], 'deep': {'k': 'v'}} for i in range(10)]
+    data = hippy.decode(hippy.encode(records), lazy=True)
+    assert isinstance(data, LazySequence)
+    eq_(len(data), 10)
+    eq_(data[-1], records[-1])
+    eq_(data[2:5], records[2:5])
+    eq_(data, records)
+    eq_(list(reversed(data)), records[::-1])
+
+def test_only_accessed_parsed():
+    doc = 'good: 1\nbad:\n    x: "\\q"\nworse: [\n'
+    data = hippy.decode(doc, lazy=True)
+    eq_(list(data), ['good', 'bad', 'worse'])
+    eq_(data['good'], 1)
+
+def test_error_line():
+    data = hippy.decode('a: 1\n\nb:\n    c: 1\n    d 2', lazy=True)
+    try:
+        data['b']
+    except ParseError as e:
+        eq_(e.line, 4)
+    else:
+        assert False
+
+    data = hippy.decode('-\na: 1\n--\n\nb: 1\n--\nc:\n    d 2\n-', lazy=True)
+    eq_(data[1], {'b': 1})
+    try:
+        data[2]
+    except ParseError as e:
+        eq_(e.line, 7)
+    else:
+        assert False
+
+def test_same_as_decode():
+    docs = [
+        'a: 1\nb:\n    x: 1\n# c\n    y: 2\nc: "s"  # note\na: 2',
+        '-\n--\na: 1\n--\n--\nb: 2\n-',
+        '-\na: 1 # c\n--\nb: 2\n-',
+    ]
+    for doc in docs:
+        data = hippy.decode(doc, lazy=True)
+        assert isinstance(data, (LazyMapping, LazySequence))
+        eq_(data, hippy.decode(doc))
+
+    # '-' or '--' followed by anything isn't split on
+    docs = [
+        '-\na: 1 # c\n--\nb: 2\n- # end',
+        '- # people\nid: 1\nname: "a"\n-- # next\nid: 2\nname: "b"\n-',
+        '-\na: 1\n-- # c\nb: 2\n-',
+        '-\na: 1\n--  \nb: 2\n-',
+    ]
+    for doc in docs:
+        eq_(hippy.decode(doc, lazy=True), hippy.decode(doc))
+
+def test_not_split():
+    # documents where lines at the start of the line aren't all top-level
+    docs = [
+        'a:\nb: 1\nc: 2',
+        'a: 1\n2',
+        'a: 1\n  \nb: 2',
+        'a: -\nb: 1\n-',
+        'a: 1\n    b: 2',
+        '-\na: 1\n--\n  b: 1\n-',
+        '-\na: 1\n-\nb: 2\n--\nc: 3\n-',
+        'a: 1\rb: 2',
+        '1, 2',
+        '--',
+        hippy.encode([{'a': [1, 2, []]}, {'b': 2}, {'c': 3}]),
+        '-\na:\n    1\n    2-\nb: 2\n--\nc: 3\n-',
+    ]
+    for doc in docs:
+        data = hippy.decode(doc, lazy=True)
+        assert type(data) in (dict, list), doc
+        eq_(data, hippy.decode(doc))
+
+@raises(ValueError)
+def test_lazy_engine():
+    hippy.decode('a: 1', engine='stack', lazy=True)
@@ -2,13 +2,13 @@ from nose.tools import *
 from hippy.lexer import *
 
 def token_types(tokens):
-    return [token['type'] for token in tokens]
+    return [token.type for token in tokens]
 
 def token_lines(tokens):
-    return [token['line'] for token in tokens]
+    return [token.line for token in tokens]
 
 def token_values(tokens):
-    return [token['value'] for token in tokens]
+    return [token.value for token in tokens]
 
 def test_init():
     l = Lexer('hello')
@@ -84,6 +84,104 @@ def test_multiline():
     eq_(token_lines(l), [0, 0, 0, 1])
     eq_(token_values(l), [True, 'hello', '\n', False])
 
+def test_first_line():
+    l = list(Lexer('yes\nno', 5))
+    eq_(token_lines(l), [5, 5, 6])
+
 @raises(LexError)
 def test_unknown():
     l = list(Lexer('*'))
+
+def test_token_order():
+    l = list(Lexer("nothing: -1, 'a'\n-\n"))
+    eq_(token_types(l), [
+        TokenType.bool, TokenType.id, TokenType.colon, TokenType.ws,
+        TokenType.int, TokenType.comma, TokenType.ws, TokenType.str,
+        TokenType.lbreak, TokenType.hyphen,
+    ])
+    eq_(token_lines(l), [0, 0, 0, 0, 0, 0, 0, 0, 0, 1])
+
+def test_token_array():
+    content = "a: 1.5, 'x' # hi\nb: nil"
+    tokens = Lexer(content).tokenize()
+    eq_(len(tokens), 14)
+    eq_(token_types(tokens), token_types(Lexer(content)))
+    eq_(token_values(tokens), token_values(Lexer(content)))
+    eq_(token_lines(tokens), token_lines(Lexer(content)))
+
+    tokens = Lexer(content).tokenize(comments=False)
+    assert TokenType.comment not in token_types(tokens)
+
+    copy = TokenArray.from_tokens(Lexer(content))
+    eq_(copy.content, content)
+    eq_(token_values(copy), token_values(Lexer(content)))
+
+def test_string_escapes():
+    l = list(Lexer(r'''"tab\tnew\nline" 'oct\101 hex\x41 é \N{BULLET} \q' "plain"'''))
+    eq_(token_values(l), ['tab\tnew\nline', ' ', 'octA hexA é • \\q', ' ', 'plain'])
+
+    tokens = Lexer(r'"a\"b" "c"').tokenize()
+    eq_(tokens.value(0), 'a"b')
+    eq_(tokens.value(2), 'c')
+
+@raises(ValueError)
+def test_bad_escape():
+    Lexer(r'"\x4"').tokenize().value(0)
+
+def test_stream_chunks():
+    content = "  a: 'a long\\tstring', -1.5e-3\r\n\tb: nothing # done\r\n  "
+    expected = [(t.type, t.text, t.line) for t in Lexer(content)]
+    for size in range(1, len(content) + 1):
+        chunks = [content[i:i+size] for i in range(0, len(content), size)]
+        l = list(StreamLexer(chunks))
+        eq_([(t.type, t.text, t.line) for t in l], expected)
+
+        tokens = StreamLexer(chunks).tokenize()
+        eq_([(t.type, t.text, t.line) for t in tokens], expected)
+
+def test_stream_file():
+    import io
+    l = StreamLexer(io.StringIO('yes\nno'), chunk_size=2)
+    eq_(token_values(l), [True, '\n', False])
+
+@raises(LexError)
+def test_stream_unknown():
+    list(StreamLexer(['a: ', '*']))
+
+def test_stream_pending_token():
+    # an unterminated string is only scanned again once the buffer doubled
+    chunks = ['a: "x'] + ['y' * 10] * 1000
+    l = StreamLexer(iter(chunks))
+    fills = []
+    fill = l._fill
+    l._fill = lambda: fills.append(1) or fill()
+    try:
+        list(l)
+    except LexError as e:
+        eq_(e.line, 0)
+    else:
+        assert False
+    assert len(fills) < 20
+
+def test_bytes_lexer():
+    content = "  a: 'tab\there', -1.5e-3, \"é\\u00e9\"\r\n\tb: nothing # done\r\n  "
+    expected = [(t.type, t.text, t.line, t.value) for t in Lexer(content)]
+    l = list(BytesLexer(content.encode('utf-8')))
+    eq_([(t.type, t.text, t.line, t.value) for t in l], expected)
+
+    tokens = BytesLexer(content.encode('utf-8')).tokenize()
+    eq_([(t.type, t.text, t.line, t.value) for t in tokens], expected)
+    eq_([tokens.value(i) for i in range(len(tokens))], [e[3] for e in expected])
+
+def test_bytes_lexer_in_place():
+    content = bytearray(b'a: "x"')
+    tokens = BytesLexer(content).tokenize()
+    assert tokens.content is content
+
+def test_bytes_unknown():
+    try:
+        BytesLexer('a: *'.encode('utf-8')).tokenize()
+    except LexError as e:
+        eq_(e.char, '*')
+    else:
+        assert False, 'LexError not raised'
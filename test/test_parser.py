@@ -15,6 +15,9 @@ def skip(msg):
 def parser(data):
     return Parser(Lexer(data))
 
+def stream_parser(data, size=3):
+    return StreamParser(StreamLexer(data[i:i+size] for i in range(0, len(data), size)))
+
 def test_init():
     p = parser('a: 1')
 
@@ -318,4 +321,44 @@ def test_complex_structure():
 
     eq_(p.data, d)
 
+def test_stream_parser():
+    docs = [
+        'a: 1\nb: 2, 3\nc:\n    d: yes\n    e:\n        1\n        2\n',
+        '-\na: "x"\n--\nb: nil\n-',
+        '1\n2\n    3\n4',
+        'a: 1 # comment\n# another\nb: 2',
+    ]
+    for doc in docs:
+        for size in (1, 2, 5, 100):
+            eq_(stream_parser(doc, size).data, parser(doc).data)
+
+def test_trailing_comment():
+    for doc in ('a: 1  # comment', '1 # comment', 'a:\n    b: "x" # comment'):
+        data = parser(doc.replace('# comment', '')).data
+        eq_(parser(doc).data, data)
+        eq_(stream_parser(doc, 3).data, data)
+
+def test_separator_whitespace():
+    doc = '- # records\nid: 1\nname: "a"\n--  \nid: 2\nname: "b"\n-'
+    data = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]
+    eq_(parser(doc).data, data)
+    eq_(stream_parser(doc, 3).data, data)
+
+def test_stream_window():
+    doc = '\n'.join('k{}: {}'.format(i, i) for i in range(1000))
+    p = stream_parser(doc)
+    eq_(len(p.data), 1000)
+    assert len(p._window) < 10
+
+def test_lookahead_tables():
+    doc = 'a: 1, "x"\n\nb:\n    1\n  \n    2 # c\n    - \nc: nil'
+    p = parser(doc)
+    p._build_tables()
+    s = StreamParser(Lexer(doc).tokenize(comments=False))
+    for i in range(p.num_tokens):
+        eq_(p._count_ws(i), s._count_ws(i))
+        eq_(p._skip_literals(i), s._skip_literals(i))
+        eq_(p._skip_blank(i), s._skip_blank(i))
+        eq_(p._next_indent(i), s._next_indent(i))
+
 # TODO: test that stuff fails correctly
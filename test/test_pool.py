@@ -0,0 +1,134 @@
+from nose.tools import *
+import os
+import tempfile
+import hippy
+from hippy.pool import *
+from hippy.parser import ParseError
+
+
+def write_files(tmp, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp, '{}.hip'.format(i))
+        hippy.write(path, {'tenant': i, 'tags': ['a', i]})
+        paths.append(path)
+    return paths
+
+def test_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(tmp, 10)
+        eq_([len(b) for b in batches(paths, 10**6, 4)], [4, 4, 2])
+        eq_([len(b) for b in batches(paths, 1, 4)], [1] * 10)
+        eq_(list(batches(['missing'], 1, 4)), [['missing']])
+
+def test_read_many():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(tmp, 20)
+        bad = os.path.join(tmp, 'bad.hip')
+        with open(bad, 'w') as f:
+            f.write('a: 1\nb 2')
+        paths[5:5] = [bad, os.path.join(tmp, 'missing.hip')]
+
+        for workers in (1, 2):
+            results = list(hippy.read_many(paths, workers=workers))
+            eq_([r.path for r in results], paths)
+            eq_(results[0], Result(paths[0], {'tenant': 0, 'tags': ['a', 0]}, None))
+            assert isinstance(results[5].error, ParseError)
+            assert isinstance(results[6].error, OSError)
+            eq_(results[5].data, None)
+            eq_(sum(r.error is None for r in results), 20)
+
+def test_unordered():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(tmp, 30)
+        results = list(read_many(paths, workers=2, ordered=False, batch_files=4))
+        eq_(sorted(r.path for r in results), sorted(paths))
+        assert all(r.data == hippy.read(r.path) for r in results)
+
+def test_split_object_list():
+    doc = '-\na: 1\n--\nb: 2\n--  # c\nc: 3\n--\nd: 4\n-'
+    eq_(split_object_list(doc, 10), ['a: 1', 'b: 2\n--  # c\nc: 3', 'd: 4'])
+    eq_(split_object_list(doc, 1), ['a: 1\n--\nb: 2\n--  # c\nc: 3\n--\nd: 4'])
+    eq_(split_object_list('- # c\na: 1\n--\nb: 2\n-', 3), None)
+    eq_(split_object_list('a: 1', 3), None)
+    eq_(split_object_list('--', 3), None)
+
+def test_decode():
+    data = [{'id': i, 'tags': ['a', i], 'meta': {'deep': [{'x': i}]}} for i in range(200)]
+    doc = hippy.encode(data)
+    for workers in (1, 2):
+        eq_(hippy.decode(doc, workers=workers), data)
+
+def test_decode_unsplittable():
+    # '--' lines which belong to nested lists or records which the serial
+    # parser would split differently
+    docs = [
+        '-\na: 1\n--\nb:\n-\nc: 1\n--\nd: 2\n-\n--\ne: 3\n-',
+        '-\na: 1\n  \n--\nb: 1\nc: 2\n--\nd: 1\ne: 2\n-',
+        '-\na:\n    -\n    b: 1\n--\n    c: 2\n    -\nd: 3\n--\ne: 1\n-',
+        '-\na: 1\n-\nb: 2\n--\nc: 3\n-',
+        '- # records\n' + '\n--\n'.join(
+            'id: {}\nname: "{}"'.format(i, i) for i in range(8)
+        ) + '\n-',
+        '-\nid: 1\nname: "a"\n--  \nid: 2\nname: "b"\n-- # x\nid: 3\n-',
+        'a: 1\nb: 2',
+    ]
+    for doc in docs:
+        eq_(hippy.decode(doc, workers=2), hippy.decode(doc))
+
+@raises(ParseError)
+def test_decode_error():
+    hippy.decode('-\na: 1\n--\nb:\n1\n--\n2\n--\nc: 1\n-', workers=2)
+
+def test_read_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'list.hip')
+        data = [{'tenant': i} for i in range(50)]
+        hippy.write(path, data)
+        eq_(hippy.read(path, workers=2), data)
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def as_list(value):
+    return [value.x, value.y]
+
+def records(count):
+    return [
+        {'id': i, 'tags': ['a', i], 'empty': {}, 'deep': [{'x': [i, [i]]}, 'b']}
+        for i in range(count)
+    ]
+
+def test_encode():
+    for data in (records(100), records(1), [], [{}, {}], {'a': records(3)}):
+        for workers in (1, 2):
+            eq_(hippy.encode(data, workers=workers), hippy.encode(data))
+
+def test_encode_default():
+    data = records(20)
+    data[13]['point'] = Point(1, 2)
+    expected = hippy.encode(data, default=as_list)
+    eq_(hippy.encode(data, default=as_list, workers=2), expected)
+    # neither the lambda nor the generator can be sent to a worker
+    eq_(hippy.encode(data, default=lambda v: [v.x, v.y], workers=2), expected)
+    data[3]['gen'] = (i for i in range(3))
+    eq_(hippy.encode(data, default=as_list, workers=2), hippy.encode(
+        data[:3] + [dict(data[3], gen=[0, 1, 2])] + data[4:], default=as_list
+    ))
+
+@raises(TypeError)
+def test_encode_error():
+    data = records(20)
+    data[13]['point'] = Point(1, 2)
+    hippy.encode(data, workers=2)
+
+def test_dump():
+    data = records(50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'list.hip')
+        with open(path, 'w') as f:
+            hippy.dump(data, f, workers=2)
+        with open(path) as f:
+            eq_(f.read(), hippy.encode(data))
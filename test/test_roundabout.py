@@ -13,6 +13,20 @@ def skip(msg):
 def roundabout(data):
     return data == hippy.decode(hippy.encode(data))
 
+def test_files():
+    import os
+    import tempfile
+    data = {'a': [1, 2, 3], 'b': {'c': 'a string', 'd': [{'e': None}]}}
+    fd, path = tempfile.mkstemp(suffix='.hip')
+    os.close(fd)
+    try:
+        hippy.write(path, data)
+        eq_(hippy.read(path), data)
+        eq_(hippy.read(path, stream=True), data)
+        eq_(hippy.read(path, mmap=True), data)
+    finally:
+        os.remove(path)
+
 def test_literals():
     assert roundabout(-76)
     assert roundabout(-987.654e-321)
@@ -0,0 +1,62 @@
+from nose.tools import *
+import os
+import tempfile
+import hippy
+from hippy.sidecar import *
+
+
+def write(tmp, data):
+    path = os.path.join(tmp, 'a.hip')
+    hippy.write(path, data)
+    return path
+
+def test_path():
+    eq_(sidecar_path('a/b.hip'), 'a/b.hipc')
+    eq_(sidecar_path('a/b.conf'), 'a/b.conf.hipc')
+
+def test_written():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, {'a': [1, 2.5, 'three', None, True]})
+        eq_(hippy.read(path, sidecar=True), hippy.read(path))
+        assert os.path.exists(sidecar_path(path))
+        eq_(sorted(os.listdir(tmp)), ['a.hip', 'a.hipc'])
+        eq_(hippy.read(path, sidecar=True), hippy.read(path))
+
+def test_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, {'a': 1})
+        read(path)
+        # swap in other data of the same size and mtime
+        info = os.stat(path)
+        with open(path, 'w') as f:
+            f.write('a: 2')
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns))
+        eq_(read(path), {'a': 1})
+
+def test_changed():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, {'a': 1})
+        read(path)
+        hippy.write(path, {'a': 12})
+        eq_(read(path), {'a': 12})
+        eq_(read(path), {'a': 12})
+
+def test_touched():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, {'a': 1})
+        read(path)
+        info = os.stat(path)
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        with open(sidecar_path(path), 'rb') as f:
+            before = f.read()
+        eq_(read(path), {'a': 1})
+        with open(sidecar_path(path), 'rb') as f:
+            assert f.read() != before
+
+def test_corrupt():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write(tmp, {'a': 1})
+        for junk in (b'', b'HIPC', b'not a sidecar at all, not at all, no'):
+            with open(sidecar_path(path), 'wb') as f:
+                f.write(junk)
+            eq_(read(path), {'a': 1})
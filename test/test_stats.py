@@ -0,0 +1,52 @@
+from nose.tools import *
+import hippy
+from hippy.lexer import TokenType
+from hippy.stats import *
+
+
+doc = '''a: 1, "two"
+b:
+    c: nil
+    d:
+        -
+        e: yes
+        -
+f:
+    1
+    2'''
+
+def test_decode():
+    stats = Stats()
+    eq_(hippy.decode(doc, stats=stats), hippy.decode(doc))
+    eq_(set(stats.times), {'lex', 'parse', 'values'})
+    assert stats.times['values'] <= stats.times['parse']
+    eq_(stats.tokens[TokenType.id], 6)
+    eq_(stats.tokens[TokenType.hyphen], 2)
+    assert TokenType.comment not in stats.tokens
+    eq_(stats.max_depth, 4)
+    assert stats.lookaheads > 0
+    assert stats.lookahead_steps > 0
+    eq_(stats.peak_memory, None)
+
+def test_encode():
+    stats = Stats()
+    data = hippy.decode(doc)
+    eq_(hippy.encode(data, stats=stats), hippy.encode(data))
+    eq_(set(stats.times), {'compile'})
+    eq_(stats.max_depth, 4)
+
+def test_memory():
+    stats = Stats(trace_memory=True)
+    hippy.decode(doc, stats=stats)
+    assert stats.peak_memory > 0
+    assert stats.peak_memory >= stats.memory
+
+def test_hook():
+    calls = []
+    stats = Stats(hook=lambda stage, seconds: calls.append(stage))
+    hippy.decode(doc, stats=stats)
+    eq_(calls, ['lex', 'parse'])
+
+@raises(ValueError)
+def test_stack_engine():
+    hippy.decode(doc, engine='stack', stats=Stats())